@@ -11,19 +11,16 @@ logger = logging.getLogger(__name__)
 
 
 class Tool(ABC):
-    """Abstract base class for agent tools."""
+    """Abstract base class for agent tools.
     
-    @property
-    @abstractmethod
-    def name(self) -> str:
-        """Tool name."""
-        pass
+    Subclasses provide ``name`` and ``description``, either as plain
+    attributes or as properties.
+    """
     
-    @property
-    @abstractmethod
-    def description(self) -> str:
-        """Tool description."""
-        pass
+    __slots__ = ()
+    
+    name: str
+    description: str
     
     @abstractmethod
     def execute(self, **kwargs) -> Any:
@@ -38,11 +35,14 @@ class BaseAgent(ABC):
         """Initialize agent."""
         self.name = name
         self.tools: Dict[str, Tool] = {}
+        self._graph: Optional[Graph] = None
+        self._graph_issues: Optional[List[str]] = None
     
     def register_tool(self, tool: Tool) -> None:
         """Register a tool with the agent."""
-        self.tools[tool.name] = tool
-        logger.info(f"Tool '{tool.name}' registered for agent '{self.name}'")
+        name = tool.name
+        self.tools[name] = tool
+        logger.info("Tool '%s' registered for agent '%s'", name, self.name)
     
     def get_tool(self, name: str) -> Optional[Tool]:
         """Get a tool by name."""
@@ -57,6 +57,22 @@ class BaseAgent(ABC):
         """Create the agent's execution graph."""
         pass
     
+    def build_graph(self) -> Graph:
+        """Build a new execution graph rather than reuse a cached one.
+        
+        Defaults to ``create_graph()``; agents that cache their graph
+        override it.
+        """
+        return self.create_graph()
+    
+    def validate_graph(self, graph: Graph) -> List[str]:
+        """Validate a graph, reusing the result for the agent's cached graph."""
+        if graph is not self._graph:
+            return graph.validate()
+        if self._graph_issues is None:
+            self._graph_issues = graph.validate()
+        return self._graph_issues
+    
     @abstractmethod
     def process_input(self, user_input: str) -> AgentState:
         """Process user input and create initial state."""
@@ -76,9 +92,9 @@ class BaseAgent(ABC):
         graph = self.create_graph()
         
         # Validate graph
-        issues = graph.validate()
+        issues = self.validate_graph(graph)
         if issues:
-            logger.warning(f"Graph validation issues: {issues}")
+            logger.warning("Graph validation issues: %s", issues)
         
         # Execute graph
         final_state = graph.execute(initial_state)
@@ -90,32 +106,28 @@ class BaseAgent(ABC):
 class SimpleTool(Tool):
     """Simple tool implementation."""
     
+    __slots__ = ("name", "description", "_func")
+    
     def __init__(self, name: str, description: str, func: Callable):
         """Initialize simple tool."""
-        self._name = name
-        self._description = description
+        self.name = name
+        self.description = description
         self._func = func
     
-    @property
-    def name(self) -> str:
-        return self._name
-    
-    @property
-    def description(self) -> str:
-        return self._description
-    
     def execute(self, **kwargs) -> Any:
         """Execute the tool function."""
         try:
             return self._func(**kwargs)
         except Exception as e:
-            logger.error(f"Tool '{self.name}' execution failed: {e}")
+            logger.error("Tool '%s' execution failed: %s", self.name, e)
             raise
 
 
 class ToolResult:
     """Container for tool execution results."""
     
+    __slots__ = ("tool_name", "result", "error")
+    
     def __init__(self, tool_name: str, result: Any, error: str = None):
         """Initialize tool result."""
         self.tool_name = tool_name
@@ -138,6 +150,8 @@ class ToolResult:
 class AgentStep:
     """Container for agent execution steps."""
     
+    __slots__ = ("step_type", "content", "tool_results")
+    
     def __init__(self, step_type: str, content: str, tool_results: List[ToolResult] = None):
         """Initialize agent step."""
         self.step_type = step_type
@@ -149,5 +163,8 @@ class AgentStep:
         return {
             "type": self.step_type,
             "content": self.content,
-            "tool_results": [result.to_dict() for result in self.tool_results]
+            "tool_results": [
+                {"tool": result.tool_name, "result": result.result, "error": result.error}
+                for result in self.tool_results
+            ]
         }
\ No newline at end of file
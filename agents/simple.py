@@ -1,7 +1,10 @@
 """Simple reasoning agent implementation."""
 
+import os
 import re
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from .base import BaseAgent, SimpleTool, ToolResult
 from core.state import AgentState
 from core.graph import Graph
@@ -19,6 +22,105 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Keywords hinting at tool usage (calculator, weather, search), matched as
+# case-insensitive substrings
+_TOOL_KEYWORDS_RE = re.compile(
+    r'calculate|math|compute|[-+*/=]'
+    r'|weather|temperature|forecast'
+    r'|search|find|look up|information about',
+    re.IGNORECASE
+)
+
+# Argument extraction patterns, compiled once and keyed by tool name
+_TOOL_ARG_PATTERNS = {
+    "calculator": tuple(re.compile(p, re.IGNORECASE) for p in (
+        r'calculate\s+(.+)',
+        r'what\s+is\s+(.+)',
+        r'compute\s+(.+)',
+        r'(.+)=\?',
+        r'(.+)\s*=\s*$'
+    )),
+    "weather": tuple(re.compile(p, re.IGNORECASE) for p in (
+        r'weather\s+in\s+(.+)',
+        r'weather\s+(.+)',
+        r'temperature\s+in\s+(.+)',
+        r'temperature\s+(.+)'
+    )),
+    "search": tuple(re.compile(p, re.IGNORECASE) for p in (
+        r'search\s+for\s+(.+)',
+        r'search\s+(.+)',
+        r'find\s+(.+)',
+        r'look\s+up\s+(.+)'
+    )),
+}
+
+# Characters that are not part of a calculator expression
+_CALC_CLEAN_RE = re.compile(r'[^0-9+\-*/().\s]')
+
+# ASCII deletion table equivalent to _CALC_CLEAN_RE, for str.translate
+_CALC_STRIP_TABLE = {i: None for i in range(128) if _CALC_CLEAN_RE.match(chr(i))}
+
+
+def _clean_expression(expr: str) -> str:
+    """Strip characters that cannot appear in a calculator expression."""
+    if expr.isascii():
+        return expr.translate(_CALC_STRIP_TABLE)
+    return _CALC_CLEAN_RE.sub('', expr)
+
+# Tools are tried in this order; the first registered tool yielding an
+# argument wins, so an empty match falls through to the next tool.
+_TOOL_PRIORITY = ("calculator", "weather", "search")
+
+# Conversational reply triggers, matched as case-insensitive substrings.
+# Branches are tried in priority order (greeting, thanks, goodbye).
+_REPLY_RE = re.compile(
+    r'\A(?:'
+    r'[\s\S]*?(?P<greeting>hello|hi|hey)'
+    r'|[\s\S]*?(?P<thanks>thank)'
+    r'|[\s\S]*?(?P<goodbye>bye)'
+    r')',
+    re.IGNORECASE
+)
+
+_REPLIES = {
+    "greeting": "Hello! I'm a simple agent that can help you with calculations, weather information, and searches. How can I assist you?",
+    "thanks": "You're welcome! Is there anything else I can help you with?",
+    "goodbye": "Goodbye! Feel free to come back if you need help.",
+}
+
+
+# Tool name -> argument name filled by its _TOOL_ARG_PATTERNS
+_TOOL_ARG_NAMES = {
+    "calculator": "expression",
+    "weather": "location",
+    "search": "query",
+}
+
+
+@lru_cache(maxsize=2048)
+def _extract_arg(user_input: str, tool_name: str) -> Optional[Tuple[str, str]]:
+    """Extract a tool's (argument name, value) pair from user input.
+    
+    The first pattern yielding a non-empty value wins. Cached on the
+    (input, tool) pair, as it is a pure function of both.
+    """
+    arg_name = _TOOL_ARG_NAMES.get(tool_name)
+    if arg_name is None:
+        return None
+    
+    for pattern in _TOOL_ARG_PATTERNS[tool_name]:
+        match = pattern.search(user_input)
+        if match:
+            value = match.group(1).strip()
+            if tool_name == "calculator":
+                # Clean up the expression
+                value = _clean_expression(value)
+            if value:
+                return arg_name, value
+    
+    return None
+
+
 class SimpleAgent(BaseAgent):
     """Simple reasoning agent with basic tool usage."""
     
@@ -26,6 +128,7 @@ class SimpleAgent(BaseAgent):
         """Initialize simple agent."""
         super().__init__(name)
         self.max_iterations = 5
+        self.tool_concurrency = int(os.getenv("TOOL_CONCURRENCY_LIMIT", "4"))
         self._setup_tools()
     
     def _setup_tools(self):
@@ -51,90 +154,35 @@ class SimpleAgent(BaseAgent):
     
     def _should_use_tool(self, user_input: str) -> bool:
         """Determine if user input requires tool usage."""
-        tool_keywords = {
-            "calculator": ["calculate", "math", "compute", "+", "-", "*", "/", "="],
-            "weather": ["weather", "temperature", "forecast"],
-            "search": ["search", "find", "look up", "information about"]
-        }
-        
-        input_lower = user_input.lower()
-        
-        for tool_name, keywords in tool_keywords.items():
-            if any(keyword in input_lower for keyword in keywords):
-                return True
-        
-        return False
+        return _TOOL_KEYWORDS_RE.search(user_input) is not None
     
     def _extract_tool_args(self, user_input: str, tool_name: str) -> Dict[str, Any]:
         """Extract tool arguments from user input."""
-        if tool_name == "calculator":
-            # Extract mathematical expressions
-            patterns = [
-                r'calculate\s+(.+)',
-                r'what\s+is\s+(.+)',
-                r'compute\s+(.+)',
-                r'(.+)=\?',
-                r'(.+)\s*=\s*$'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
-                if match:
-                    expr = match.group(1).strip()
-                    # Clean up the expression
-                    expr = re.sub(r'[^0-9+\-*/().\s]', '', expr)
-                    if expr:
-                        return {"expression": expr}
+        extracted = _extract_arg(user_input, tool_name)
+        if extracted is None:
+            return {}
         
-        elif tool_name == "weather":
-            # Extract location
-            patterns = [
-                r'weather\s+in\s+(.+)',
-                r'weather\s+(.+)',
-                r'temperature\s+in\s+(.+)',
-                r'temperature\s+(.+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
-                if match:
-                    location = match.group(1).strip()
-                    if location:
-                        return {"location": location}
+        arg_name, value = extracted
+        return {arg_name: value}
+    
+    def _dispatch(self, user_input: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Choose a tool and extract its arguments."""
+        if not self._should_use_tool(user_input):
+            return None, {}
         
-        elif tool_name == "search":
-            # Extract search query
-            patterns = [
-                r'search\s+for\s+(.+)',
-                r'search\s+(.+)',
-                r'find\s+(.+)',
-                r'look\s+up\s+(.+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
-                if match:
-                    query = match.group(1).strip()
-                    if query:
-                        return {"query": query}
+        for tool_name in _TOOL_PRIORITY:
+            if tool_name not in self.tools:
+                continue
+            extracted = _extract_arg(user_input, tool_name)
+            if extracted is not None:
+                arg_name, value = extracted
+                return tool_name, {arg_name: value}
         
-        return {}
+        return None, {}
     
     def _choose_tool(self, user_input: str) -> Optional[str]:
         """Choose appropriate tool based on user input."""
-        if self._should_use_tool(user_input):
-            input_lower = user_input.lower()
-            
-            # Priority order for tool selection
-            tool_priorities = ["calculator", "weather", "search"]
-            
-            for tool_name in tool_priorities:
-                if tool_name in self.tools:
-                    args = self._extract_tool_args(user_input, tool_name)
-                    if args:
-                        return tool_name
-        
-        return None
+        return self._dispatch(user_input)[0]
     
     def _generate_response(self, state: AgentState) -> str:
         """Generate response based on current state."""
@@ -154,19 +202,14 @@ class SimpleAgent(BaseAgent):
         if state.messages:
             last_message = state.messages[-1]
             if last_message["role"] == "user":
-                user_input = last_message["content"].lower()
+                user_input = last_message["content"]
                 
                 # Simple response patterns
-                if any(word in user_input for word in ["hello", "hi", "hey"]):
-                    return "Hello! I'm a simple agent that can help you with calculations, weather information, and searches. How can I assist you?"
-                
-                elif any(word in user_input for word in ["thank", "thanks"]):
-                    return "You're welcome! Is there anything else I can help you with?"
-                
-                elif any(word in user_input for word in ["bye", "goodbye"]):
-                    return "Goodbye! Feel free to come back if you need help."
+                match = _REPLY_RE.match(user_input)
+                if match:
+                    return _REPLIES[match.lastgroup]
                 
-                elif "?" in user_input:
+                if "?" in user_input:
                     return "I understand you're asking a question. Let me help you with that."
         
         return "I'm processing your request. Please let me know if you need any specific information."
@@ -177,8 +220,7 @@ class SimpleAgent(BaseAgent):
             return False
         
         # Check if we've reached maximum iterations
-        message_count = len([msg for msg in state.messages if msg["role"] == "assistant"])
-        if message_count >= self.max_iterations:
+        if state.assistant_count >= self.max_iterations:
             return False
         
         # Check if we have a good response
@@ -192,10 +234,24 @@ class SimpleAgent(BaseAgent):
         return True
     
     def create_graph(self) -> Graph:
-        """Create the agent's execution graph."""
-        from core.graph import Graph
+        """Create the agent's execution graph.
         
-        graph = Graph(f"{self.name}_graph")
+        The topology only depends on the agent name, so the graph is built
+        once and the same instance is returned on subsequent calls.
+        """
+        graph_name = f"{self.name}_graph"
+        if self._graph is None or self._graph.name != graph_name:
+            self._graph = self._build_graph(graph_name)
+            self._graph_issues = None
+        return self._graph
+    
+    def build_graph(self) -> Graph:
+        """Build a new execution graph, bypassing the cached one."""
+        return self._build_graph(f"{self.name}_graph")
+    
+    def _build_graph(self, graph_name: str) -> Graph:
+        """Build a new execution graph."""
+        graph = Graph(graph_name)
         
         # Add nodes
         graph.add_node("input", self._create_input_node)
@@ -224,47 +280,55 @@ class SimpleAgent(BaseAgent):
             return state
         
         # Get the last user message
-        user_messages = [msg for msg in state.messages if msg["role"] == "user"]
-        if not user_messages:
+        user_input = state.last_user_message()
+        if user_input is None:
             return state
         
-        user_input = user_messages[-1]["content"]
-        
         # Determine if we need to use tools
-        tool_name = self._choose_tool(user_input)
+        tool_name, tool_args = self._dispatch(user_input)
         if tool_name:
-            tool_args = self._extract_tool_args(user_input, tool_name)
-            if tool_args:
-                return state.add_tool_call(tool_name, tool_args)
+            return state.add_tool_call(tool_name, tool_args)
         
         return state
     
-    def _use_tool_node(self, state: AgentState) -> AgentState:
-        """Execute tool calls."""
-        if not state.tool_calls:
-            return state
-        
-        # Execute the first tool call
-        tool_call = state.tool_calls[0]
+    def _execute_tool_call(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a single tool call and return its intermediate step."""
         tool_name = tool_call["tool"]
         tool_args = tool_call["args"]
         
-        if tool_name in self.tools:
-            try:
-                tool = self.tools[tool_name]
-                result = tool.execute(**tool_args)
-                return state.add_intermediate_step({
-                    "tool": tool_name,
-                    "args": tool_args,
-                    "result": result
-                })
-            except Exception as e:
-                return state.add_intermediate_step({
-                    "tool": tool_name,
-                    "args": tool_args,
-                    "error": str(e)
-                })
+        try:
+            result = self.tools[tool_name].execute(**tool_args)
+            return {
+                "tool": tool_name,
+                "args": tool_args,
+                "result": result
+            }
+        except Exception as e:
+            return {
+                "tool": tool_name,
+                "args": tool_args,
+                "error": str(e)
+            }
+    
+    def _use_tool_node(self, state: AgentState) -> AgentState:
+        """Execute tool calls.
+        
+        Multiple tool calls run concurrently in a thread pool; the resulting
+        steps are added to the state in call order on the calling thread.
+        """
+        tool_calls = [call for call in state.tool_calls if call["tool"] in self.tools]
+        if not tool_calls:
+            return state
+        
+        if len(tool_calls) == 1 or self.tool_concurrency <= 1:
+            steps = [self._execute_tool_call(call) for call in tool_calls]
+        else:
+            max_workers = min(self.tool_concurrency, len(tool_calls))
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                steps = list(pool.map(self._execute_tool_call, tool_calls))
         
+        for step in steps:
+            state = state.add_intermediate_step(step)
         return state
     
     def _respond_node(self, state: AgentState) -> AgentState:
@@ -294,8 +358,8 @@ class SimpleAgent(BaseAgent):
     def format_output(self, state: AgentState) -> str:
         """Format the final state for output."""
         # Get the last assistant message
-        assistant_messages = [msg for msg in state.messages if msg["role"] == "assistant"]
-        if assistant_messages:
-            return assistant_messages[-1]["content"]
+        output = state.last_assistant_message()
+        if output is not None:
+            return output
         
         return "No response generated."
\ No newline at end of file
@@ -2,6 +2,7 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from typing import Dict, Any, Optional
 import logging
@@ -13,12 +14,21 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def create_app() -> FastAPI:
-    """Create and configure the FastAPI application."""
+def create_app(enable_docs: bool = True) -> FastAPI:
+    """Create and configure the FastAPI application.
+    
+    Args:
+        enable_docs: Serve /docs, /redoc and /openapi.json. Disabling them
+            skips OpenAPI schema generation, e.g. for test apps.
+    """
     app = FastAPI(
         title="LangGraph Toy API",
         description="A custom LangGraph implementation with web interface",
-        version="1.0.0"
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+        docs_url="/docs" if enable_docs else None,
+        redoc_url="/redoc" if enable_docs else None,
+        openapi_url="/openapi.json" if enable_docs else None
     )
     
     # Add CORS middleware
@@ -41,7 +51,7 @@ def create_app() -> FastAPI:
     @app.get("/")
     async def root():
         """Root endpoint."""
-        return {"message": "LangGraph Toy API", "docs": "/docs"}
+        return {"message": "LangGraph Toy API", "docs": app.docs_url}
     
     @app.get("/web")
     async def web_interface():
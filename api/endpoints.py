@@ -1,7 +1,12 @@
 """API endpoints for LangGraph toy."""
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Header
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from collections import deque
+from typing import AsyncContextManager, AsyncIterator, Callable, Deque, Dict, Any, Optional, Tuple
+import asyncio
+import os
+import threading
 import time
 import logging
 from agents.simple import SimpleAgent
@@ -15,8 +20,79 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-# Global agent instance
-simple_agent = SimpleAgent()
+def _create_agent() -> SimpleAgent:
+    """Create an agent with its graph built and validated up front."""
+    agent = SimpleAgent()
+    agent.validate_graph(agent.create_graph())
+    return agent
+
+
+# Pool of pre-warmed agents so concurrent executions never share an instance
+AGENT_POOL_SIZE = max(1, int(os.getenv("AGENT_POOL_SIZE", "4")))
+_idle_agents: Deque[SimpleAgent] = deque(_create_agent() for _ in range(AGENT_POOL_SIZE))
+# Requests waiting for an agent, as (event loop, future) pairs in arrival order
+_agent_waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[SimpleAgent]"]] = deque()
+_agent_pool_lock = threading.Lock()
+
+# Global agent instance for read-only endpoints (tool listing, graph inspection)
+simple_agent = _create_agent()
+
+
+def _deliver_agent(future: "asyncio.Future[SimpleAgent]", agent: SimpleAgent) -> None:
+    """Hand an agent to a waiter (runs on the waiter's loop)."""
+    if future.cancelled():
+        _release_agent(agent)
+    else:
+        future.set_result(agent)
+
+
+def _release_agent(agent: SimpleAgent) -> None:
+    """Return an agent to the pool, handing it straight to a waiter if any."""
+    with _agent_pool_lock:
+        while _agent_waiters:
+            loop, future = _agent_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_deliver_agent, future, agent)
+                return
+            except RuntimeError:
+                # Waiter's event loop is closed; try the next one
+                continue
+        _idle_agents.append(agent)
+
+
+@asynccontextmanager
+async def acquire_agent() -> AsyncIterator[SimpleAgent]:
+    """Borrow an agent from the pool for the duration of a request.
+
+    Waiting is done on a future rather than in a worker thread, so queued
+    requests never occupy the threads that running requests need.
+    """
+    with _agent_pool_lock:
+        if _idle_agents:
+            future = None
+            agent = _idle_agents.popleft()
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            _agent_waiters.append((loop, future))
+    if future is not None:
+        try:
+            agent = await future
+        except asyncio.CancelledError:
+            # Cancelled after the agent was handed over; return it to the pool
+            if future.done() and not future.cancelled():
+                _release_agent(future.result())
+            raise
+    try:
+        yield agent
+    finally:
+        _release_agent(agent)
+
+
+# Agent type -> pool acquirer, looked up once per chat request
+AGENTS: Dict[str, Callable[[], AsyncContextManager[SimpleAgent]]] = {
+    "simple": acquire_agent,
+}
 
 
 @router.post("/execute", response_model=ExecuteResponse)
@@ -26,14 +102,15 @@ async def execute_graph(request: ExecuteRequest):
     
     try:
         # Create graph based on type
-        if request.graph_type == "simple_agent":
-            graph = simple_agent.create_graph()
-            initial_state = simple_agent.process_input(request.input_data.get("message", ""))
-        else:
+        if request.graph_type != "simple_agent":
             raise HTTPException(status_code=400, detail=f"Unknown graph type: {request.graph_type}")
         
-        # Execute graph
-        result_state = graph.execute(initial_state)
+        async with acquire_agent() as agent:
+            graph = agent.create_graph()
+            initial_state = agent.process_input(request.input_data.get("message", ""))
+            
+            # Execute graph off the event loop
+            result_state = await asyncio.to_thread(graph.execute, initial_state)
         
         execution_time = time.time() - start_time
         
@@ -44,7 +121,7 @@ async def execute_graph(request: ExecuteRequest):
         )
     
     except Exception as e:
-        logger.error(f"Graph execution failed: {e}")
+        logger.error("Graph execution failed: %s", e)
         execution_time = time.time() - start_time
         return ExecuteResponse(
             success=False,
@@ -58,44 +135,34 @@ async def execute_graph(request: ExecuteRequest):
 async def chat_with_agent(request: ChatRequest, http_request: Request, x_execution_strategy: Optional[str] = Header(None)):
     """Chat with an agent using configurable execution strategy."""
     try:
-        agent = simple_agent
+        # ChatRequest only admits registered agent types (422 otherwise)
+        acquire = AGENTS[request.agent_type]
         
-        if request.agent_type == "simple":
-            # Select execution strategy using multi-level decision
-            strategy = strategy_selector.create_strategy(
-                request_strategy=request.strategy,
-                header_strategy=x_execution_strategy,
-                request_complexity=len(request.message)  # Simple complexity measure
-            )
-            
-            # Execute with selected strategy
+        # Select execution strategy using multi-level decision
+        strategy = strategy_selector.create_strategy(
+            request_strategy=request.strategy,
+            header_strategy=x_execution_strategy,
+            request_complexity=len(request.message)  # Simple complexity measure
+        )
+        
+        # Execute with selected strategy
+        async with acquire() as agent:
             start_time = time.time()
-            response = strategy.execute(agent, request.message)
+            response, request_stats = await asyncio.to_thread(strategy.execute_with_stats, agent, request.message)
             execution_time = time.time() - start_time
-            
-            # Get strategy stats
-            stats = strategy.get_stats()
-            
-            return ChatResponse(
-                response=response,
-                agent_type=request.agent_type,
-                timestamp=time.time(),
-                strategy_used=stats.get("strategy", "unknown"),
-                execution_stats={
-                    "execution_time": execution_time,
-                    "cache_hits": stats.get("cache_hits", 0),
-                    "cache_misses": stats.get("cache_misses", 0),
-                    "hit_rate": stats.get("hit_rate", 0.0)
-                }
-            )
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown agent type: {request.agent_type}")
+        
+        # The strategy instance is shared, so cache counts come from this
+        # request alone rather than the strategy's running totals
+        return ChatResponse(
+            response=response,
+            agent_type=request.agent_type,
+            timestamp=time.time(),
+            strategy_used=strategy.get_stats().get("strategy", "unknown"),
+            execution_stats={"execution_time": execution_time, **request_stats}
+        )
     
-    except HTTPException:
-        # Re-raise HTTP exceptions (like 400 for bad requests)
-        raise
     except Exception as e:
-        logger.error(f"Chat failed: {e}")
+        logger.error("Chat failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -171,7 +238,7 @@ async def manage_state(request: GraphStateRequest):
             raise HTTPException(status_code=400, detail=f"Unknown operation: {request.operation}")
     
     except Exception as e:
-        logger.error(f"State operation failed: {e}")
+        logger.error("State operation failed: %s", e)
         return GraphStateResponse(
             success=False,
             state={},
@@ -184,7 +251,7 @@ async def validate_graph():
     """Validate the current graph structure."""
     try:
         graph = simple_agent.create_graph()
-        issues = graph.validate()
+        issues = simple_agent.validate_graph(graph)
         
         return {
             "graph_name": graph.name,
@@ -196,7 +263,7 @@ async def validate_graph():
         }
     
     except Exception as e:
-        logger.error(f"Graph validation failed: {e}")
+        logger.error("Graph validation failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -213,7 +280,7 @@ async def visualize_graph():
         }
     
     except Exception as e:
-        logger.error(f"Graph visualization failed: {e}")
+        logger.error("Graph visualization failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -228,9 +295,10 @@ async def execute_custom_graph(request: Dict[str, Any]):
         input_data = request.get("input_data", {})
         
         if graph_type == "simple_agent":
-            graph = simple_agent.create_graph()
-            initial_state = simple_agent.process_input(input_data.get("message", ""))
-            result_state = graph.execute(initial_state)
+            async with acquire_agent() as agent:
+                graph = agent.create_graph()
+                initial_state = agent.process_input(input_data.get("message", ""))
+                result_state = await asyncio.to_thread(graph.execute, initial_state)
             
             return {
                 "success": True,
@@ -241,16 +309,31 @@ async def execute_custom_graph(request: Dict[str, Any]):
             raise HTTPException(status_code=400, detail=f"Unknown graph type: {request.graph_type}")
     
     except Exception as e:
-        logger.error(f"Custom graph execution failed: {e}")
+        logger.error("Custom graph execution failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# (second, formatted local time) of the last health check timestamp
+_health_timestamp: Tuple[int, str] = (-1, "")
+
+
+def _format_health_timestamp() -> str:
+    """Format the current local time, reusing the string within a second."""
+    global _health_timestamp
+    now = int(time.time())
+    cached = _health_timestamp
+    if cached[0] != now:
+        cached = (now, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)))
+        _health_timestamp = cached
+    return cached[1]
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": _format_health_timestamp(),
         "agents": len([simple_agent]),
         "ready": True
     }
\ No newline at end of file
@@ -1,7 +1,11 @@
 """Pydantic models for API requests and responses."""
 
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional
+
+
+# Agent types served by /chat; anything else is rejected with 422 at parse time
+AgentType = Literal["simple"]
 
 
 class ExecuteRequest(BaseModel):
@@ -21,7 +25,7 @@ class ExecuteResponse(BaseModel):
 class ChatRequest(BaseModel):
     """Request model for chat interactions."""
     message: str
-    agent_type: str = "simple"
+    agent_type: AgentType = "simple"
     strategy: Optional[str] = None  # "traditional", "compiled", "auto"
 
 
@@ -31,6 +35,7 @@ class ChatResponse(BaseModel):
     agent_type: str
     timestamp: float
     strategy_used: Optional[str] = None
+    # Statistics for this request only: execution_time, cache_hits, cache_misses, hit_rate
     execution_stats: Optional[Dict[str, Any]] = None
 
 
@@ -44,4 +49,4 @@ class GraphStateResponse(BaseModel):
     """Response model for state operations."""
     success: bool
     state: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
@@ -1,6 +1,6 @@
 """Agent compiler using decorator pattern - provides LangGraph-like compile() interface."""
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence, Tuple
 from core.execution import ExecutionStrategy, StrategyFactory
 from agents.base import BaseAgent
 import logging
@@ -9,6 +9,15 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Inputs used by AgentCompiler.benchmark when none are given
+_DEFAULT_BENCH_INPUTS: Tuple[str, ...] = (
+    "Hello, how are you?",
+    "What is 2 + 2?",
+    "What's the weather like?",
+    "Help me calculate 15 * 3",
+)
+
+
 class CompiledAgent:
     """A compiled agent wrapper that provides optimized execution.
     
@@ -16,6 +25,8 @@ class CompiledAgent:
     compiled execution without modifying the original agent.
     """
     
+    __slots__ = ("_agent", "_strategy", "_compiled_at")
+    
     def __init__(self, agent: BaseAgent, strategy: ExecutionStrategy):
         """Initialize compiled agent.
         
@@ -26,7 +37,7 @@ class CompiledAgent:
         self._agent = agent
         self._strategy = strategy
         self._compiled_at = None
-        logger.info(f"Compiled agent created for {agent.name} using {strategy.__class__.__name__}")
+        logger.info("Compiled agent created for %s using %s", agent.name, strategy.__class__.__name__)
     
     @property
     def name(self) -> str:
@@ -40,7 +51,7 @@ class CompiledAgent:
     
     def run(self, user_input: str) -> str:
         """Run the compiled agent."""
-        logger.debug(f"Executing compiled agent {self.name} with {self._strategy.__class__.__name__}")
+        logger.debug("Executing compiled agent %s with %s", self.name, self._strategy.__class__.__name__)
         return self._strategy.execute(self._agent, user_input)
     
     def get_stats(self) -> Dict[str, Any]:
@@ -84,7 +95,8 @@ class AgentCompiler:
         
         Args:
             agent: The agent to compile
-            strategy: Execution strategy ("traditional", "compiled", "auto")
+            strategy: Execution strategy ("traditional", "compiled", "auto",
+                or any name added with StrategyFactory.register)
             
         Returns:
             CompiledAgent instance
@@ -100,17 +112,10 @@ class AgentCompiler:
             compiled_agent = AgentCompiler.compile(agent, "traditional")
             ```
         """
-        if strategy == "traditional":
-            execution_strategy = StrategyFactory.create_traditional()
-        elif strategy == "compiled":
-            execution_strategy = StrategyFactory.create_compiled()
-        elif strategy == "auto":
-            execution_strategy = StrategyFactory.create_best_automatic()
-        else:
-            raise ValueError(f"Unknown strategy: {strategy}. Use 'traditional', 'compiled', or 'auto'")
+        execution_strategy = StrategyFactory.create(strategy)
         
         compiled_agent = CompiledAgent(agent, execution_strategy)
-        logger.info(f"Agent {agent.name} compiled with {strategy} strategy")
+        logger.info("Agent %s compiled with %s strategy", agent.name, strategy)
         
         return compiled_agent
     
@@ -129,7 +134,7 @@ class AgentCompiler:
         return CompiledAgent(agent, strategy)
     
     @staticmethod
-    def benchmark(agent: BaseAgent, test_inputs: list = None) -> Dict[str, Any]:
+    def benchmark(agent: BaseAgent, test_inputs: Optional[Sequence[str]] = None) -> Dict[str, Any]:
         """Benchmark different execution strategies for an agent.
         
         Args:
@@ -140,12 +145,7 @@ class AgentCompiler:
             Benchmark results comparing different strategies
         """
         if test_inputs is None:
-            test_inputs = [
-                "Hello, how are you?",
-                "What is 2 + 2?",
-                "What's the weather like?",
-                "Help me calculate 15 * 3"
-            ]
+            test_inputs = _DEFAULT_BENCH_INPUTS
         
         strategies = [
             StrategyFactory.create_traditional(),
@@ -155,7 +155,7 @@ class AgentCompiler:
         from core.execution import ExecutionBenchmark
         results = ExecutionBenchmark.benchmark(agent, test_inputs, strategies)
         
-        logger.info(f"Benchmark completed for {agent.name}")
+        logger.info("Benchmark completed for %s", agent.name)
         return results
 
 
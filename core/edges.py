@@ -1,7 +1,12 @@
 """Edge creation utilities and common edge conditions."""
 
 from typing import Callable, Dict, Any, List
-from .state import StateSchema, AgentState, GraphState
+import operator as _op
+from .state import StateSchema
+
+
+# Marks a missing state key or attribute
+_MISSING = object()
 
 
 def always_true(state: StateSchema) -> bool:
@@ -17,7 +22,7 @@ def always_false(state: StateSchema) -> bool:
 def has_key(key: str) -> Callable[[StateSchema], bool]:
     """Create edge condition that checks if state has a key."""
     def condition(state: StateSchema) -> bool:
-        return key in state.to_dict()
+        return state.get(key, _MISSING) is not _MISSING
     return condition
 
 
@@ -38,36 +43,36 @@ def key_exists_and_true(key: str) -> Callable[[StateSchema], bool]:
 def has_messages(min_count: int = 1) -> Callable[[StateSchema], bool]:
     """Create edge condition that checks if AgentState has minimum messages."""
     def condition(state: StateSchema) -> bool:
-        if isinstance(state, AgentState):
-            return len(state.messages) >= min_count
-        return False
+        messages = getattr(state, "messages", None)
+        return messages is not None and len(messages) >= min_count
     return condition
 
 
 def is_complete(state: StateSchema) -> Callable[[StateSchema], bool]:
     """Create edge condition that checks if state is complete."""
     def condition(state: StateSchema) -> bool:
-        if isinstance(state, AgentState):
-            return state.is_complete
-        return state.get("is_complete", False)
+        complete = getattr(state, "is_complete", _MISSING)
+        if complete is _MISSING:
+            return state.get("is_complete", False)
+        return complete
     return condition
 
 
 def has_tool_calls() -> Callable[[StateSchema], bool]:
     """Create edge condition that checks if AgentState has tool calls."""
     def condition(state: StateSchema) -> bool:
-        if isinstance(state, AgentState):
-            return len(state.tool_calls) > 0
-        return False
+        tool_calls = getattr(state, "tool_calls", None)
+        return tool_calls is not None and len(tool_calls) > 0
     return condition
 
 
 def current_node_equals(node_name: str) -> Callable[[StateSchema], bool]:
     """Create edge condition that checks current node."""
     def condition(state: StateSchema) -> bool:
-        if isinstance(state, GraphState):
-            return state.current_node == node_name
-        return state.get("current_node") == node_name
+        current_node = getattr(state, "current_node", _MISSING)
+        if current_node is _MISSING:
+            return state.get("current_node") == node_name
+        return current_node == node_name
     return condition
 
 
@@ -78,27 +83,31 @@ def value_in_list(key: str, valid_values: List[Any]) -> Callable[[StateSchema],
     return condition
 
 
+_NUMERIC_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    ">": _op.gt,
+    ">=": _op.ge,
+    "<": _op.lt,
+    "<=": _op.le,
+    "==": _op.eq,
+    "!=": _op.ne,
+}
+
+
 def numeric_condition(key: str, operator: str, value: float) -> Callable[[StateSchema], bool]:
-    """Create edge condition for numeric comparisons."""
+    """Create edge condition for numeric comparisons.
+    
+    The comparison is resolved once here, so the returned condition only
+    performs the type check and the compare.
+    """
+    compare = _NUMERIC_OPERATORS.get(operator)
+    if compare is None:
+        raise ValueError(f"Unknown operator: {operator}")
+    
     def condition(state: StateSchema) -> bool:
         state_value = state.get(key)
         if not isinstance(state_value, (int, float)):
             return False
-        
-        if operator == ">":
-            return state_value > value
-        elif operator == ">=":
-            return state_value >= value
-        elif operator == "<":
-            return state_value < value
-        elif operator == "<=":
-            return state_value <= value
-        elif operator == "==":
-            return state_value == value
-        elif operator == "!=":
-            return state_value != value
-        else:
-            return False
+        return compare(state_value, value)
     return condition
 
 
@@ -122,17 +131,82 @@ def string_starts_with(key: str, prefix: str) -> Callable[[StateSchema], bool]:
     return condition
 
 
+def bulk_string_contains(values: List[Any], substring: str) -> List[bool]:
+    """Evaluate ``string_contains`` over a batch of raw values.
+    
+    Intended for benchmark and load loops that check many values at once;
+    single edge checks should keep using the ``string_contains`` closure.
+    Non-string values yield False, as in the closure.
+    """
+    return [isinstance(value, str) and substring in value for value in values]
+
+
+def bulk_string_starts_with(values: List[Any], prefix: str) -> List[bool]:
+    """Evaluate ``string_starts_with`` over a batch of raw values."""
+    return [isinstance(value, str) and value.startswith(prefix) for value in values]
+
+
+def _flatten_conditions(conditions: tuple, attr: str) -> tuple:
+    """Inline operands of nested combinators tagged with ``attr``."""
+    flat = []
+    for cond in conditions:
+        flat.extend(getattr(cond, attr, (cond,)))
+    return tuple(flat)
+
+
 def logical_and(*conditions: Callable[[StateSchema], bool]) -> Callable[[StateSchema], bool]:
-    """Create edge condition that combines multiple conditions with AND."""
-    def condition(state: StateSchema) -> bool:
-        return all(cond(state) for cond in conditions)
+    """Create edge condition that combines multiple conditions with AND.
+    
+    Nested AND conditions are flattened and up to three operands are
+    unrolled into a plain short-circuit expression.
+    """
+    flat = _flatten_conditions(conditions, "_conjunction")
+    
+    if len(flat) == 1:
+        first, = flat
+        def condition(state: StateSchema) -> bool:
+            return bool(first(state))
+    elif len(flat) == 2:
+        first, second = flat
+        def condition(state: StateSchema) -> bool:
+            return bool(first(state) and second(state))
+    elif len(flat) == 3:
+        first, second, third = flat
+        def condition(state: StateSchema) -> bool:
+            return bool(first(state) and second(state) and third(state))
+    else:
+        def condition(state: StateSchema) -> bool:
+            return all(cond(state) for cond in flat)
+    
+    condition._conjunction = flat
     return condition
 
 
 def logical_or(*conditions: Callable[[StateSchema], bool]) -> Callable[[StateSchema], bool]:
-    """Create edge condition that combines multiple conditions with OR."""
-    def condition(state: StateSchema) -> bool:
-        return any(cond(state) for cond in conditions)
+    """Create edge condition that combines multiple conditions with OR.
+    
+    Nested OR conditions are flattened and up to three operands are
+    unrolled into a plain short-circuit expression.
+    """
+    flat = _flatten_conditions(conditions, "_disjunction")
+    
+    if len(flat) == 1:
+        first, = flat
+        def condition(state: StateSchema) -> bool:
+            return bool(first(state))
+    elif len(flat) == 2:
+        first, second = flat
+        def condition(state: StateSchema) -> bool:
+            return bool(first(state) or second(state))
+    elif len(flat) == 3:
+        first, second, third = flat
+        def condition(state: StateSchema) -> bool:
+            return bool(first(state) or second(state) or third(state))
+    else:
+        def condition(state: StateSchema) -> bool:
+            return any(cond(state) for cond in flat)
+    
+    condition._disjunction = flat
     return condition
 
 
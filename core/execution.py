@@ -1,12 +1,15 @@
 """Execution strategies for agents - Open/Closed Principle compliant."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from core.state import AgentState
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Any, Hashable, NamedTuple, Optional, Tuple
 from core.graph import Graph
 import logging
-import hashlib
+import threading
 import time
+import weakref
 
 
 logger = logging.getLogger(__name__)
@@ -15,6 +18,8 @@ logger = logging.getLogger(__name__)
 class ExecutionStrategy(ABC):
     """Abstract base class for agent execution strategies."""
     
+    __slots__ = ()
+    
     @abstractmethod
     def execute(self, agent, user_input: str) -> str:
         """Execute agent with given input using this strategy."""
@@ -24,131 +29,206 @@ class ExecutionStrategy(ABC):
     def get_stats(self) -> Dict[str, Any]:
         """Get performance statistics for this strategy."""
         pass
+    
+    def execute_with_stats(self, agent, user_input: str) -> Tuple[str, Dict[str, Any]]:
+        """Execute agent and return the result with cache statistics for this call only.
+        
+        Unlike ``get_stats``, the counts are not accumulated across calls,
+        so they stay meaningful when one strategy instance serves many requests.
+        """
+        return self.execute(agent, user_input), {"cache_hits": 0, "cache_misses": 0, "hit_rate": 0.0}
 
 
 class TraditionalStrategy(ExecutionStrategy):
-    """Traditional execution strategy - creates graph on each execution."""
+    """Traditional execution strategy - builds a fresh graph on each execution.
+    
+    Bypasses the agent's cached graph, so every run pays the full
+    construction and validation cost.
+    """
+    
+    __slots__ = ("execution_count", "total_time_ns", "_stats_lock")
     
     def __init__(self):
         self.execution_count = 0
-        self.total_time = 0.0
+        self.total_time_ns = 0
+        self._stats_lock = threading.Lock()
+    
+    @property
+    def total_time(self) -> float:
+        """Total execution time in seconds."""
+        return self.total_time_ns / 1e9
     
     def execute(self, agent, user_input: str) -> str:
         """Execute agent using traditional approach."""
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         # Use existing agent methods unchanged
         initial_state = agent.process_input(user_input)
-        graph = agent.create_graph()
+        graph = agent.build_graph()
         
         # Validate and execute
         issues = graph.validate()
         if issues:
-            logger.warning(f"Graph validation issues: {issues}")
+            logger.warning("Graph validation issues: %s", issues)
         
         final_state = graph.execute(initial_state)
         result = agent.format_output(final_state)
         
         # Update statistics
-        self.execution_count += 1
-        self.total_time += time.time() - start_time
+        elapsed = time.perf_counter_ns() - start_time
+        with self._stats_lock:
+            self.execution_count += 1
+            self.total_time_ns += elapsed
         
         return result
     
     def get_stats(self) -> Dict[str, Any]:
         """Get performance statistics."""
-        avg_time = self.total_time / self.execution_count if self.execution_count > 0 else 0
+        total_time = self.total_time
+        avg_time = total_time / self.execution_count if self.execution_count > 0 else 0
         return {
             "strategy": "traditional",
             "execution_count": self.execution_count,
-            "total_time": self.total_time,
+            "total_time": total_time,
             "avg_time": avg_time
         }
 
 
+class _Entry(NamedTuple):
+    """Cached graph together with its validation result."""
+    graph: Graph
+    valid: bool
+
+
 class GraphCache:
-    """Simple cache for compiled graphs."""
+    """Simple cache for compiled graphs.
+    
+    Each entry stores the graph together with its validation result, which
+    is computed once when the graph is cached. When full, the least recently
+    used entry is evicted.
+    """
     
     def __init__(self, max_size: int = 50):
-        self._cache: Dict[str, Graph] = {}
-        self._validation_cache: Dict[str, bool] = {}
+        self._cache: "OrderedDict[Hashable, _Entry]" = OrderedDict()
         self._max_size = max_size
+        # Guards the OrderedDict; never held while a graph executes
+        self._lock = threading.Lock()
     
-    def _generate_key(self, agent) -> str:
-        """Generate cache key for agent."""
-        # Key based on agent identity and tools
-        tools_key = tuple(sorted(agent.tools.keys()))
-        key_data = f"{agent.__class__.__name__}_{agent.name}_{tools_key}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+    def _generate_key(self, agent) -> Hashable:
+        """Generate cache key for agent.
+        
+        A cached graph's nodes are bound to the agent that built it and read
+        its tools when they run, so the key is a weak reference to the agent
+        itself: no other agent may reuse the graph, and adding tools does not
+        require a new one.
+        """
+        return weakref.ref(agent)
     
-    def get(self, agent) -> Optional[Graph]:
-        """Get cached graph for agent."""
-        key = self._generate_key(agent)
-        return self._cache.get(key)
+    def get(self, agent, key: Optional[Hashable] = None) -> Optional[_Entry]:
+        """Get cached (graph, is_valid) entry for agent, optionally using a precomputed key."""
+        if key is None:
+            key = self._generate_key(agent)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+        return entry
     
-    def set(self, agent, graph: Graph) -> str:
-        """Cache graph for agent."""
-        key = self._generate_key(agent)
+    def set(self, agent, graph: Graph, key: Optional[Hashable] = None) -> _Entry:
+        """Validate and cache graph for agent, optionally using a precomputed key."""
+        if key is None:
+            key = self._generate_key(agent)
         
-        # Simple eviction policy
-        if len(self._cache) >= self._max_size:
-            self._cache.clear()
-            self._validation_cache.clear()
+        entry = _Entry(graph, len(graph.validate()) == 0)
         
-        self._cache[key] = graph
-        return key
+        with self._lock:
+            # LRU eviction
+            if key not in self._cache and len(self._cache) >= self._max_size:
+                self._cache.popitem(last=False)
+            self._cache[key] = entry
+        return entry
     
-    def is_valid(self, key: str) -> bool:
+    def is_valid(self, key: Hashable) -> bool:
         """Check if cached graph is valid."""
-        if key not in self._validation_cache:
-            graph = self._cache[key]
-            issues = graph.validate()
-            self._validation_cache[key] = len(issues) == 0
-        return self._validation_cache[key]
+        return self._cache[key].valid
     
     def clear(self):
         """Clear all cached graphs."""
-        self._cache.clear()
-        self._validation_cache.clear()
+        with self._lock:
+            self._cache.clear()
 
 
 class CompiledStrategy(ExecutionStrategy):
     """Compiled execution strategy - caches and reuses graphs."""
     
+    __slots__ = (
+        "cache", "execution_count", "cache_hits", "cache_misses",
+        "total_time_ns", "compilation_time_ns", "_stats_lock"
+    )
+    
     def __init__(self, cache_size: int = 50):
         self.cache = GraphCache(cache_size)
         self.execution_count = 0
         self.cache_hits = 0
         self.cache_misses = 0
-        self.total_time = 0.0
-        self.compilation_time = 0.0
+        self.total_time_ns = 0
+        self.compilation_time_ns = 0
+        self._stats_lock = threading.Lock()
+    
+    @property
+    def total_time(self) -> float:
+        """Total execution time in seconds."""
+        return self.total_time_ns / 1e9
+    
+    @property
+    def compilation_time(self) -> float:
+        """Total graph compilation time in seconds."""
+        return self.compilation_time_ns / 1e9
     
     def execute(self, agent, user_input: str) -> str:
         """Execute agent using compiled approach."""
-        start_time = time.time()
+        return self._execute(agent, user_input)[0]
+    
+    def execute_with_stats(self, agent, user_input: str) -> Tuple[str, Dict[str, Any]]:
+        """Execute agent and report whether this call hit the graph cache."""
+        result, cache_hit = self._execute(agent, user_input)
+        return result, {
+            "cache_hits": int(cache_hit),
+            "cache_misses": int(not cache_hit),
+            "hit_rate": float(cache_hit)
+        }
+    
+    def _execute(self, agent, user_input: str) -> Tuple[str, bool]:
+        """Execute agent, returning the result and whether the graph was cached."""
+        start_time = time.perf_counter_ns()
         
         # Try to get cached graph
-        graph = self.cache.get(agent)
-        
-        if graph is None:
-            # Cache miss - create and cache graph
-            compilation_start = time.time()
-            graph = agent.create_graph()
-            cache_key = self.cache.set(agent, graph)
-            self.compilation_time += time.time() - compilation_start
-            self.cache_misses += 1
-            logger.debug(f"Graph cache miss for {agent.name}, compiled and cached")
+        cache_key = self.cache._generate_key(agent)
+        entry = self.cache.get(agent, key=cache_key)
+        cache_hit = entry is not None
+        
+        if entry is None:
+            # Cache miss - create, validate and cache graph
+            compilation_start = time.perf_counter_ns()
+            entry = self.cache.set(agent, agent.create_graph(), key=cache_key)
+            compilation_elapsed = time.perf_counter_ns() - compilation_start
+            with self._stats_lock:
+                self.compilation_time_ns += compilation_elapsed
+                self.cache_misses += 1
+            logger.debug("Graph cache miss for %s, compiled and cached", agent.name)
         else:
             # Cache hit
-            self.cache_hits += 1
-            logger.debug(f"Graph cache hit for {agent.name}")
+            with self._stats_lock:
+                self.cache_hits += 1
+            logger.debug("Graph cache hit for %s", agent.name)
         
-        # Validate cached graph
-        cache_key = self.cache._generate_key(agent)
-        if not self.cache.is_valid(cache_key):
-            logger.warning(f"Cached graph validation failed for {agent.name}")
-            # Fallback to fresh graph
-            graph = agent.create_graph()
+        graph, is_valid = entry
+        if not is_valid:
+            logger.warning("Cached graph validation failed for %s", agent.name)
+            # Rebuild and re-cache, so an agent whose graph has since been
+            # fixed stops running the stale invalid one
+            entry = self.cache.set(agent, agent.build_graph(), key=cache_key)
+            graph = entry.graph
         
         # Execute using existing agent methods
         initial_state = agent.process_input(user_input)
@@ -156,16 +236,19 @@ class CompiledStrategy(ExecutionStrategy):
         result = agent.format_output(final_state)
         
         # Update statistics
-        self.execution_count += 1
-        self.total_time += time.time() - start_time
+        elapsed = time.perf_counter_ns() - start_time
+        with self._stats_lock:
+            self.execution_count += 1
+            self.total_time_ns += elapsed
         
-        return result
+        return result, cache_hit
     
     def get_stats(self) -> Dict[str, Any]:
         """Get performance statistics."""
         total_requests = self.cache_hits + self.cache_misses
         hit_rate = self.cache_hits / total_requests if total_requests > 0 else 0
-        avg_time = self.total_time / self.execution_count if self.execution_count > 0 else 0
+        total_time = self.total_time
+        avg_time = total_time / self.execution_count if self.execution_count > 0 else 0
         
         return {
             "strategy": "compiled",
@@ -173,7 +256,7 @@ class CompiledStrategy(ExecutionStrategy):
             "cache_hits": self.cache_hits,
             "cache_misses": self.cache_misses,
             "hit_rate": hit_rate,
-            "total_time": self.total_time,
+            "total_time": total_time,
             "avg_time": avg_time,
             "compilation_time": self.compilation_time,
             "cache_size": len(self.cache._cache),
@@ -183,9 +266,10 @@ class CompiledStrategy(ExecutionStrategy):
     def clear_cache(self):
         """Clear the graph cache."""
         self.cache.clear()
-        self.cache_hits = 0
-        self.cache_misses = 0
-        self.compilation_time = 0.0
+        with self._stats_lock:
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.compilation_time_ns = 0
         logger.info("Compiled strategy cache cleared")
 
 
@@ -207,25 +291,62 @@ class StrategyFactory:
         """Create the best strategy based on heuristics."""
         # For now, default to compiled as it's generally better
         return CompiledStrategy()
+    
+    @staticmethod
+    def create(name: str) -> ExecutionStrategy:
+        """Create a strategy by registered name.
+        
+        Raises:
+            ValueError: If no strategy is registered under ``name``
+        """
+        creator = _STRATEGY_CREATORS.get(name)
+        if creator is None:
+            known = ", ".join(f"'{known_name}'" for known_name in _STRATEGY_CREATORS)
+            raise ValueError(f"Unknown strategy: {name}. Use one of {known}")
+        return creator()
+    
+    @staticmethod
+    def register(name: str, creator: Callable[[], ExecutionStrategy]) -> None:
+        """Register a zero-argument strategy creator under ``name``."""
+        _STRATEGY_CREATORS[name] = creator
+
+
+# Strategy name -> creator, used by StrategyFactory.create
+_STRATEGY_CREATORS: Dict[str, Callable[[], ExecutionStrategy]] = {
+    "traditional": StrategyFactory.create_traditional,
+    "compiled": StrategyFactory.create_compiled,
+    "auto": StrategyFactory.create_best_automatic,
+}
 
 
 class ExecutionBenchmark:
     """Utility for benchmarking different execution strategies."""
     
     @staticmethod
-    def benchmark(agent, test_inputs: list, strategies: list) -> Dict[str, Any]:
-        """Benchmark multiple execution strategies."""
+    def benchmark(agent, test_inputs: list, strategies: list, max_workers: int = 8) -> Dict[str, Any]:
+        """Benchmark multiple execution strategies.
+        
+        Inputs for each strategy are executed concurrently in a thread pool
+        of up to ``max_workers`` threads.
+        """
         results = {}
         
+        # Warm up the agent's graph and execution plan outside the timers so
+        # this one-time work isn't charged to whichever strategy runs first
+        graph = agent.create_graph()
+        graph.compile_plan()
+        graph.is_acyclic()
+        
         for strategy in strategies:
             strategy_name = strategy.__class__.__name__
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             
             try:
-                for test_input in test_inputs:
-                    strategy.execute(agent, test_input)
+                workers = max(1, min(max_workers, len(test_inputs)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    list(pool.map(partial(strategy.execute, agent), test_inputs))
                 
-                total_time = time.time() - start_time
+                total_time = (time.perf_counter_ns() - start_time) / 1e9
                 stats = strategy.get_stats()
                 
                 results[strategy_name] = {
@@ -234,10 +355,10 @@ class ExecutionBenchmark:
                     "stats": stats
                 }
                 
-                logger.info(f"{strategy_name} benchmark completed in {total_time:.3f}s")
+                logger.info("%s benchmark completed in %.3fs", strategy_name, total_time)
                 
             except Exception as e:
-                logger.error(f"{strategy_name} benchmark failed: {e}")
+                logger.error("%s benchmark failed: %s", strategy_name, e)
                 results[strategy_name] = {"error": str(e)}
         
         return results
\ No newline at end of file
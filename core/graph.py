@@ -1,6 +1,8 @@
 """Graph execution engine with nodes and edges."""
 
-from typing import Dict, Callable, Any, List, Optional, Set
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Callable, Any, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
 from .state import StateSchema, GraphState
 import logging
 
@@ -8,6 +10,24 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class Command:
+    """Atomic state write a node can return instead of a new state.
+    
+    ``update`` and the ``goto`` routing hint (stored as ``next_node``) are
+    applied to the node's input state in a single update.
+    """
+    update: Optional[Dict[str, Any]] = None
+    goto: Optional[str] = None
+    
+    def apply(self, state: StateSchema) -> StateSchema:
+        """Apply this command to state."""
+        updates = dict(self.update) if self.update else {}
+        if self.goto is not None:
+            updates["next_node"] = self.goto
+        return state.update(**updates) if updates else state
+
+
 class Node:
     """Represents a node in the graph that processes state."""
     
@@ -23,13 +43,18 @@ class Node:
     
     def execute(self, state: StateSchema) -> StateSchema:
         """Execute the node function with the given state."""
-        logger.info(f"Executing node: {self.name}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Executing node: %s", self.name)
         try:
             result = self.func(state)
-            logger.info(f"Node {self.name} completed successfully")
+            if type(result) is Command:
+                result = result.apply(state)
+            if debug:
+                logger.debug("Node %s completed successfully", self.name)
             return result
         except Exception as e:
-            logger.error(f"Node {self.name} failed: {e}")
+            logger.error("Node %s failed: %s", self.name, e)
             raise
     
     def __repr__(self) -> str:
@@ -62,22 +87,59 @@ class Edge:
         return f"Edge('{self.source}' -> '{self.target}'{condition_str})"
 
 
+class ExecutionPlan(NamedTuple):
+    """Integer-indexed form of a graph, built by ``Graph.compile_plan``."""
+    entry_id: int
+    names: Tuple[str, ...]
+    funcs: Tuple[Callable[[StateSchema], StateSchema], ...]
+    next_by_id: Tuple[Tuple[Tuple[int, Optional[Callable[[StateSchema], bool]]], ...], ...]
+    sole_next: Tuple[int, ...]
+
+
 class Graph:
     """Graph execution engine that manages nodes and edges."""
     
     def __init__(self, name: str = "graph"):
         """Initialize an empty graph."""
         self.name = name
-        self.nodes: Dict[str, Node] = {}
-        self.edges: List[Edge] = []
+        self._nodes: Dict[str, Node] = {}
+        self._nodes_view: Mapping[str, Node] = MappingProxyType(self._nodes)
+        self._edges: List[Edge] = []
         self.entry_point: Optional[str] = None
+        # Outgoing (target, condition) pairs per source node, in insertion order
+        self._edges_by_source: Dict[str, List[Tuple[str, Optional[Callable[[StateSchema], bool]]]]] = {}
+        # Sources whose only outgoing edge is unconditional -> its target
+        self._sole_targets: Dict[str, str] = {}
+        # Derived structure, computed lazily and reset whenever the graph changes
+        self._acyclic: Optional[bool] = None
+        self._linear_plan: Optional[Tuple[Tuple[str, Callable[[StateSchema], StateSchema]], ...]] = None
+        self._linear_plan_built = False
+        self._plan: Optional[ExecutionPlan] = None
+    
+    @property
+    def nodes(self) -> Mapping[str, Node]:
+        """Read-only view of the nodes by name; use ``add_node`` to change it."""
+        return self._nodes_view
+    
+    @property
+    def edges(self) -> Tuple[Edge, ...]:
+        """Snapshot of the edges in insertion order; use ``add_edge`` to change them."""
+        return tuple(self._edges)
+    
+    def _reset_derived(self) -> None:
+        """Drop derived structure after the graph changes."""
+        self._acyclic = None
+        self._linear_plan = None
+        self._linear_plan_built = False
+        self._plan = None
     
     def add_node(self, name: str, func: Callable[[StateSchema], StateSchema]) -> 'Graph':
         """Add a node to the graph."""
-        if name in self.nodes:
+        if name in self._nodes:
             raise ValueError(f"Node '{name}' already exists")
         
-        self.nodes[name] = Node(name, func)
+        self._nodes[name] = Node(name, func)
+        self._reset_derived()
         
         # If this is the first node, set it as entry point
         if self.entry_point is None:
@@ -87,116 +149,256 @@ class Graph:
     
     def add_edge(self, source: str, target: str, condition: Optional[Callable[[StateSchema], bool]] = None) -> 'Graph':
         """Add an edge to the graph."""
-        if source not in self.nodes:
+        if source not in self._nodes:
             raise ValueError(f"Source node '{source}' not found")
-        if target not in self.nodes:
+        if target not in self._nodes:
             raise ValueError(f"Target node '{target}' not found")
         
-        self.edges.append(Edge(source, target, condition))
+        self._index_edge(source, target, condition)
+        self._reset_derived()
+        return self
+    
+    def _index_edge(self, source: str, target: str, condition: Optional[Callable[[StateSchema], bool]]) -> None:
+        """Record an already-checked edge in the edge list and adjacency index."""
+        self._edges.append(Edge(source, target, condition))
+        outgoing = self._edges_by_source.setdefault(source, [])
+        outgoing.append((target, condition))
+        if len(outgoing) == 1 and condition is None:
+            self._sole_targets[source] = target
+        else:
+            self._sole_targets.pop(source, None)
+    
+    def add_edges_bulk(self, edges: Iterable[Tuple[str, str, Optional[Callable[[StateSchema], bool]]]]) -> 'Graph':
+        """Add many ``(source, target, condition)`` edges at once.
+        
+        Accepts the tuples produced by ``EdgeBuilder``. Endpoints are checked
+        once for the whole batch, and nothing is added if any is missing.
+        """
+        edges = list(edges)
+        missing = ({source for source, _, _ in edges} | {target for _, target, _ in edges}) - self._nodes.keys()
+        if missing:
+            raise ValueError(f"Edge nodes not found: {sorted(missing)}")
+        
+        for source, target, condition in edges:
+            self._index_edge(source, target, condition)
+        
+        self._reset_derived()
         return self
     
     def set_entry_point(self, node_name: str) -> 'Graph':
         """Set the entry point for the graph."""
-        if node_name not in self.nodes:
+        if node_name not in self._nodes:
             raise ValueError(f"Node '{node_name}' not found")
         self.entry_point = node_name
+        self._reset_derived()
         return self
     
     def get_next_nodes(self, current_node: str, state: StateSchema) -> List[str]:
         """Get all possible next nodes from the current node."""
+        # Sequential fast path: no conditions to evaluate
+        sole_target = self._sole_targets.get(current_node)
+        if sole_target is not None:
+            return [sole_target]
+        
         next_nodes = []
         
-        for edge in self.edges:
-            if edge.source == current_node and edge.should_follow(state):
-                next_nodes.append(edge.target)
+        for target, condition in self._edges_by_source.get(current_node, ()):
+            if condition is None or condition(state):
+                next_nodes.append(target)
         
         return next_nodes
     
+    def is_acyclic(self) -> bool:
+        """Check whether the edge structure contains no cycles (cached)."""
+        if self._acyclic is None:
+            # Kahn's algorithm: every node is removable iff there is no cycle
+            # Edges to or from unregistered nodes are left to validate()
+            in_degree = {name: 0 for name in self._nodes}
+            for edge in self._edges:
+                if edge.source in in_degree and edge.target in in_degree:
+                    in_degree[edge.target] += 1
+            
+            ready = [name for name, degree in in_degree.items() if degree == 0]
+            removed = 0
+            while ready:
+                name = ready.pop()
+                removed += 1
+                for target, _ in self._edges_by_source.get(name, ()):
+                    if target not in in_degree:
+                        continue
+                    in_degree[target] -= 1
+                    if in_degree[target] == 0:
+                        ready.append(target)
+            
+            self._acyclic = removed == len(self._nodes)
+        return self._acyclic
+    
+    def _get_linear_plan(self) -> Optional[Tuple[Tuple[str, Callable[[StateSchema], StateSchema]], ...]]:
+        """Get the pre-bound node sequence if the graph is a linear chain.
+        
+        A graph is linear when, starting at the entry point, every node has
+        either no outgoing edges or a single unconditional one, and no node
+        repeats. Returns None for any other graph.
+        """
+        if not self._linear_plan_built:
+            plan = []
+            seen: Set[str] = set()
+            current_node = self.entry_point
+            while current_node is not None:
+                if current_node in seen or current_node not in self._nodes:
+                    plan = None
+                    break
+                seen.add(current_node)
+                plan.append((current_node, self._nodes[current_node].execute))
+                
+                if current_node in self._sole_targets:
+                    current_node = self._sole_targets[current_node]
+                elif self._edges_by_source.get(current_node):
+                    plan = None
+                    break
+                else:
+                    current_node = None
+            
+            self._linear_plan = tuple(plan) if plan is not None else None
+            self._linear_plan_built = True
+        return self._linear_plan
+    
+    def compile_plan(self) -> 'ExecutionPlan':
+        """Build (once) an integer-indexed execution plan for the graph.
+        
+        Nodes are numbered in insertion order. The plan holds, per node id,
+        the node name, its bound ``execute``, the outgoing ``(target_id,
+        condition)`` pairs and the sole unconditional target id (-1 if none),
+        along with the entry point id.
+        """
+        if self._plan is None:
+            if self.entry_point not in self._nodes:
+                raise ValueError(f"Node '{self.entry_point}' not found")
+            
+            names = tuple(self._nodes)
+            ids = {name: i for i, name in enumerate(names)}
+            for outgoing in self._edges_by_source.values():
+                for target, _ in outgoing:
+                    if target not in ids:
+                        raise ValueError(f"Node '{target}' not found")
+            funcs = tuple(self._nodes[name].execute for name in names)
+            next_by_id = tuple(
+                tuple((ids[target], condition) for target, condition in self._edges_by_source.get(name, ()))
+                for name in names
+            )
+            sole_next = tuple(
+                ids[self._sole_targets[name]] if name in self._sole_targets else -1
+                for name in names
+            )
+            self._plan = ExecutionPlan(ids[self.entry_point], names, funcs, next_by_id, sole_next)
+        return self._plan
+    
     def execute(self, initial_state: StateSchema) -> StateSchema:
         """Execute the graph with the given initial state."""
         if self.entry_point is None:
             raise ValueError("Graph has no entry point")
         
-        logger.info(f"Starting graph execution: {self.name}")
+        logger.info("Starting graph execution: %s", self.name)
         
+        # Linear chains run straight through their pre-bound node sequence
+        plan = self._get_linear_plan()
+        if plan is not None:
+            current_state = initial_state
+            for _, execute_node in plan:
+                current_state = execute_node(current_state)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("No more edges to follow, execution complete")
+                logger.info("Graph execution completed. Visited nodes: %s", [name for name, _ in plan])
+            return current_state
+        
+        entry_id, names, funcs, next_by_id, sole_next = self.compile_plan()
         current_state = initial_state
-        current_node = self.entry_point
-        visited_nodes: Set[str] = set()
+        current_id = entry_id
+        visited_ids: List[int] = []
         
-        while current_node is not None:
-            if current_node in visited_nodes:
-                raise ValueError(f"Cycle detected: node '{current_node}' already visited")
-            
-            if current_node not in self.nodes:
-                raise ValueError(f"Node '{current_node}' not found")
+        # An acyclic graph can never revisit a node, so only graphs with
+        # cycles need the visited-set check
+        seen: Optional[Set[int]] = None if self.is_acyclic() else set()
+        
+        while current_id >= 0:
+            if seen is not None:
+                if current_id in seen:
+                    raise ValueError(f"Cycle detected: node '{names[current_id]}' already visited")
+                seen.add(current_id)
             
             # Execute current node
-            node = self.nodes[current_node]
-            current_state = node.execute(current_state)
-            visited_nodes.add(current_node)
+            current_state = funcs[current_id](current_state)
+            visited_ids.append(current_id)
             
-            # Find next nodes
-            next_nodes = self.get_next_nodes(current_node, current_state)
+            # Find next node
+            next_id = sole_next[current_id]
+            if next_id < 0:
+                next_ids = [target for target, condition in next_by_id[current_id]
+                            if condition is None or condition(current_state)]
+                if not next_ids:
+                    logger.info("No more edges to follow, execution complete")
+                    break
+                elif len(next_ids) > 1:
+                    logger.warning("Multiple next nodes found: %s. Taking first: %s",
+                                   [names[i] for i in next_ids], names[next_ids[0]])
+                next_id = next_ids[0]
             
-            if not next_nodes:
-                logger.info("No more edges to follow, execution complete")
-                break
-            elif len(next_nodes) > 1:
-                logger.warning(f"Multiple next nodes found: {next_nodes}. Taking first: {next_nodes[0]}")
-            
-            current_node = next_nodes[0]
+            current_id = next_id
         
-        logger.info(f"Graph execution completed. Visited nodes: {visited_nodes}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Graph execution completed. Visited nodes: %s", [names[i] for i in visited_ids])
         return current_state
     
     def validate(self) -> List[str]:
         """Validate the graph structure and return list of issues."""
         issues = []
         
-        if not self.nodes:
+        if not self._nodes:
             issues.append("Graph has no nodes")
         
         if self.entry_point is None:
             issues.append("Graph has no entry point")
-        elif self.entry_point not in self.nodes:
+        elif self.entry_point not in self._nodes:
             issues.append(f"Entry point '{self.entry_point}' not found in nodes")
         
-        # Check for orphaned nodes (no incoming edges except entry point)
+        # One pass over the edges collects incoming targets and dangling
+        # endpoints; the dangling-edge issues are reported last
+        nodes = self._nodes
         nodes_with_incoming_edges = {self.entry_point}
-        for edge in self.edges:
+        edge_issues = []
+        for edge in self._edges:
             nodes_with_incoming_edges.add(edge.target)
+            if edge.source not in nodes:
+                edge_issues.append(f"Edge source '{edge.source}' not found")
+            if edge.target not in nodes:
+                edge_issues.append(f"Edge target '{edge.target}' not found")
         
-        for node_name in self.nodes:
-            if node_name not in nodes_with_incoming_edges and node_name != self.entry_point:
+        # Check for orphaned nodes (no incoming edges except entry point)
+        for node_name in nodes:
+            if node_name not in nodes_with_incoming_edges:
                 issues.append(f"Node '{node_name}' has no incoming edges and is not entry point")
         
-        # Check for edges to non-existent nodes
-        for edge in self.edges:
-            if edge.source not in self.nodes:
-                issues.append(f"Edge source '{edge.source}' not found")
-            if edge.target not in self.nodes:
-                issues.append(f"Edge target '{edge.target}' not found")
-        
+        issues.extend(edge_issues)
         return issues
     
     def visualize(self) -> str:
         """Return a simple text visualization of the graph."""
-        if not self.nodes:
+        if not self._nodes:
             return "Empty graph"
         
         lines = [f"Graph: {self.name}"]
         lines.append(f"Entry point: {self.entry_point}")
         lines.append("Nodes:")
         
-        for node_name in self.nodes:
+        for node_name in self._nodes:
             lines.append(f"  - {node_name}")
         
         lines.append("Edges:")
-        for edge in self.edges:
+        for edge in self._edges:
             condition_str = f" [condition: {edge.condition.__name__}]" if edge.condition else ""
             lines.append(f"  - {edge.source} -> {edge.target}{condition_str}")
         
         return "\n".join(lines)
     
     def __repr__(self) -> str:
-        return f"Graph(name='{self.name}', nodes={len(self.nodes)}, edges={len(self.edges)})"
\ No newline at end of file
+        return f"Graph(name='{self.name}', nodes={len(self._nodes)}, edges={len(self._edges)})"
\ No newline at end of file
@@ -1,23 +1,60 @@
 """Common node implementations for graph execution."""
 
-from typing import Dict, Any, Callable, List
+import ast
+import operator
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Callable, List, Tuple
 from .state import StateSchema, AgentState, GraphState
+from .graph import Command
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
+def _type_dispatch(handlers: Dict[type, Callable], default: Callable) -> Callable[[type], Callable]:
+    """Build a ``type(state) -> handler`` lookup.
+    
+    Handlers are matched in order with issubclass, like the isinstance
+    ladders they replace, but only once per state type.
+    """
+    resolved: Dict[type, Callable] = {}
+    
+    def lookup(state_type: type) -> Callable:
+        handler = resolved.get(state_type)
+        if handler is None:
+            handler = next((h for base, h in handlers.items() if issubclass(state_type, base)), default)
+            resolved[state_type] = handler
+        return handler
+    
+    return lookup
+
+
+_NO_RESPONSE = "No response generated"
+
+_input_handler = _type_dispatch({
+    AgentState: lambda state, user_input: state.add_message("user", user_input),
+    GraphState: lambda state, user_input: state.add_context("user_input", user_input),
+}, lambda state, user_input: state.set("user_input", user_input))
+
+
+def _agent_output(state: AgentState) -> str:
+    """Get the last assistant message."""
+    output = state.last_assistant_message()
+    return _NO_RESPONSE if output is None else output
+
+
+_output_handler = _type_dispatch({
+    AgentState: _agent_output,
+    GraphState: lambda state: state.context.get("response", _NO_RESPONSE),
+}, lambda state: state.get("response", _NO_RESPONSE))
+
+
 def create_input_node(input_key: str = "input") -> Callable[[StateSchema], StateSchema]:
     """Create a node that processes user input."""
     def input_node(state: StateSchema) -> StateSchema:
-        user_input = state.get(input_key, "")
-        if isinstance(state, AgentState):
-            return state.add_message("user", user_input)
-        elif isinstance(state, GraphState):
-            return state.add_context("user_input", user_input)
-        else:
-            return state.set("user_input", user_input)
+        return _input_handler(type(state))(state, state.get(input_key, ""))
     
     input_node.__name__ = f"input_node_{input_key}"
     return input_node
@@ -26,19 +63,7 @@ def create_input_node(input_key: str = "input") -> Callable[[StateSchema], State
 def create_output_node(output_key: str = "output") -> Callable[[StateSchema], StateSchema]:
     """Create a node that formats output."""
     def output_node(state: StateSchema) -> StateSchema:
-        if isinstance(state, AgentState):
-            # Get the last assistant message
-            assistant_messages = [msg for msg in state.messages if msg["role"] == "assistant"]
-            if assistant_messages:
-                output = assistant_messages[-1]["content"]
-            else:
-                output = "No response generated"
-        elif isinstance(state, GraphState):
-            output = state.context.get("response", "No response generated")
-        else:
-            output = state.get("response", "No response generated")
-        
-        return state.set(output_key, output)
+        return state.set(output_key, _output_handler(type(state))(state))
     
     output_node.__name__ = f"output_node_{output_key}"
     return output_node
@@ -68,37 +93,31 @@ def create_tool_call_node(
     args_extractor: Callable[[StateSchema], Dict[str, Any]] = None
 ) -> Callable[[StateSchema], StateSchema]:
     """Create a node that calls a tool."""
+    # Everything that depends only on the factory arguments is resolved here
+    state_keys = {"result": f"{tool_name}_result", "error": f"{tool_name}_error"}
+    get_args = args_extractor or (lambda state: state.get("tool_args", {}))
+    
+    # Agent states record an intermediate step; others get a result/error key
+    record = _type_dispatch({
+        AgentState: lambda state, tool_args, kind, value: state.add_intermediate_step({
+            "tool": tool_name,
+            "args": tool_args,
+            kind: value
+        }),
+    }, lambda state, tool_args, kind, value: state.set(state_keys[kind], value))
+    
     def tool_call_node(state: StateSchema) -> StateSchema:
-        if args_extractor:
-            tool_args = args_extractor(state)
-        else:
-            tool_args = state.get("tool_args", {})
+        tool_args = get_args(state)
         
         try:
             result = tool_func(**tool_args)
-            logger.info(f"Tool '{tool_name}' executed successfully")
-            
-            if isinstance(state, AgentState):
-                return state.add_intermediate_step({
-                    "tool": tool_name,
-                    "args": tool_args,
-                    "result": result
-                })
-            else:
-                return state.set(f"{tool_name}_result", result)
+            logger.info("Tool '%s' executed successfully", tool_name)
+            return record(type(state))(state, tool_args, "result", result)
         
         except Exception as e:
-            logger.error(f"Tool '{tool_name}' failed: {e}")
+            logger.error("Tool '%s' failed: %s", tool_name, e)
             error_result = f"Error: {str(e)}"
-            
-            if isinstance(state, AgentState):
-                return state.add_intermediate_step({
-                    "tool": tool_name,
-                    "args": tool_args,
-                    "error": error_result
-                })
-            else:
-                return state.set(f"{tool_name}_error", error_result)
+            return record(type(state))(state, tool_args, "error", error_result)
     
     tool_call_node.__name__ = f"tool_call_node_{tool_name}"
     return tool_call_node
@@ -108,59 +127,113 @@ def create_conditional_node(
     condition_func: Callable[[StateSchema], bool],
     true_path: str,
     false_path: str
-) -> Callable[[StateSchema], StateSchema]:
-    """Create a node that sets the next node based on condition."""
-    def conditional_node(state: StateSchema) -> StateSchema:
-        if isinstance(state, GraphState):
-            next_node = true_path if condition_func(state) else false_path
-            return state.set_next_node(next_node)
-        else:
-            next_node = true_path if condition_func(state) else false_path
-            return state.set("next_node", next_node)
+) -> Callable[[StateSchema], Command]:
+    """Create a routing node that chooses the next node based on condition.
+    
+    The node returns a ``Command`` rather than a state: ``Graph`` applies
+    it as a single write of ``next_node``. Callers invoking the node
+    directly get the new state with ``Command.apply(state)``.
+    """
+    def conditional_node(state: StateSchema) -> Command:
+        return Command(goto=true_path if condition_func(state) else false_path)
     
     conditional_node.__name__ = f"conditional_node_{true_path}_or_{false_path}"
     return conditional_node
 
 
 # Pre-built tool functions
+# The tools are pure functions of their arguments, so repeated inputs are
+# served from LRU caches.
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+@lru_cache(maxsize=1024)
+def _parse_expression(expression: str) -> ast.expr:
+    """Parse an expression once per distinct string."""
+    return ast.parse(expression, mode="eval").body
+
+
+def _evaluate(node: ast.expr) -> Any:
+    """Evaluate a parsed arithmetic expression, allowing only numbers and operators."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp):
+        op = _BINARY_OPERATORS.get(type(node.op))
+        if op is not None:
+            return op(_evaluate(node.left), _evaluate(node.right))
+    elif isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPERATORS.get(type(node.op))
+        if op is not None:
+            return op(_evaluate(node.operand))
+    raise ValueError(f"unsupported syntax: {ast.dump(node)}")
+
+
+@lru_cache(maxsize=1024)
 def calculator_tool(expression: str) -> float:
     """Simple calculator tool."""
     try:
-        # Safe evaluation of mathematical expressions
-        allowed_names = {}
-        code = compile(expression, "<string>", "eval")
-        result = eval(code, {"__builtins__": {}}, allowed_names)
-        return float(result)
+        # Safe evaluation of mathematical expressions (no eval)
+        return float(_evaluate(_parse_expression(expression)))
     except Exception as e:
         raise ValueError(f"Cannot evaluate expression '{expression}': {e}")
 
 
+# Read-only weather table keyed by lowercase location
+_WEATHER_DATA = MappingProxyType({
+    "beijing": "Sunny, 25°C",
+    "shanghai": "Cloudy, 22°C",
+    "guangzhou": "Rainy, 28°C",
+    "shenzhen": "Sunny, 30°C"
+})
+
+_SEARCH_RESULT_PREFIXES = (
+    "Search result 1 for: ",
+    "Search result 2 for: ",
+    "Search result 3 for: "
+)
+
+
+@lru_cache(maxsize=1024)
 def weather_tool(location: str) -> str:
     """Mock weather tool."""
-    weather_data = {
-        "beijing": "Sunny, 25°C",
-        "shanghai": "Cloudy, 22°C",
-        "guangzhou": "Rainy, 28°C",
-        "shenzhen": "Sunny, 30°C"
-    }
-    return weather_data.get(location.lower(), f"Weather data not available for {location}")
+    key = location if location.islower() else location.lower()
+    weather = _WEATHER_DATA.get(key)
+    if weather is None:
+        return f"Weather data not available for {location}"
+    return weather
+
+
+@lru_cache(maxsize=1024)
+def _search_results(query: str) -> Tuple[str, ...]:
+    """Build the (immutable) mock results for a query."""
+    return tuple(prefix + query for prefix in _SEARCH_RESULT_PREFIXES)
 
 
 def search_tool(query: str) -> List[str]:
     """Mock search tool."""
-    # Mock search results
-    return [
-        f"Search result 1 for: {query}",
-        f"Search result 2 for: {query}",
-        f"Search result 3 for: {query}"
-    ]
+    # Fresh list per call so callers can't mutate the cached results
+    return list(_search_results(query))
 
 
 # Common node functions
 def log_node(node_name: str = "log") -> Callable[[StateSchema], StateSchema]:
     """Create a node that logs the current state."""
     def log_state(state: StateSchema) -> StateSchema:
-        logger.info(f"State at {node_name}: {state}")
+        # Lazy formatting: the state repr is only built if INFO is enabled
+        logger.info("State at %s: %s", node_name, state)
         return state
     return log_state
 
@@ -1,9 +1,10 @@
 """State management system with schema validation."""
 
-from typing import Dict, Any, TypeVar, Generic, Type, get_type_hints, get_origin, get_args
+from typing import Dict, Any, Optional, Tuple, TypeVar, Generic, Type, get_type_hints, get_origin
 from dataclasses import dataclass, is_dataclass
 from copy import deepcopy
-import json
+from functools import lru_cache
+import orjson
 
 
 T = TypeVar('T')
@@ -14,39 +15,76 @@ class StateValidationError(Exception):
     pass
 
 
+@lru_cache(maxsize=None)
+def _check_target(expected_type: Type) -> Type:
+    """Resolve the isinstance target for a type hint.
+    
+    Generic types like Dict[str, Any] and List[str] only check the container.
+    """
+    origin = get_origin(expected_type)
+    if origin is dict or origin is list:
+        return origin
+    return expected_type
+
+
 class StateSchema:
-    """Base class for state schemas with validation."""
+    """Base class for state schemas with validation.
+    
+    ``set``, ``update`` and ``to_dict`` share unchanged values with the
+    original state instead of deep-copying it, so stored values should be
+    treated as immutable; use ``clone`` or ``deep_to_dict`` for an
+    independent copy.
+    """
+    
+    __slots__ = ("_data",)
     
     def __init__(self, **kwargs):
         """Initialize state with validation."""
         self._validate_types(kwargs)
         self._data = deepcopy(kwargs)
     
+    @classmethod
+    def _unsafe_new(cls, data: Dict[str, Any]) -> 'StateSchema':
+        """Create a state around already-validated data without copying it."""
+        instance = object.__new__(cls)
+        instance._data = data
+        return instance
+    
+    @classmethod
+    def _field_checks(cls) -> Dict[str, Tuple[Type, Type]]:
+        """Get ``field -> (expected_type, isinstance_target)``, resolved once per class."""
+        checks = cls.__dict__.get("_cached_field_checks")
+        if checks is None:
+            checks = {}
+            for field, expected_type in get_type_hints(cls).items():
+                checks[field] = (expected_type, _check_target(expected_type))
+            cls._cached_field_checks = checks
+        return checks
+    
     def _validate_types(self, data: Dict[str, Any]) -> None:
         """Validate data types against type hints."""
-        type_hints = get_type_hints(self.__class__)
+        checks = self._field_checks()
         
-        for field, expected_type in type_hints.items():
-            if field in data:
-                value = data[field]
-                if not self._is_valid_type(value, expected_type):
-                    raise StateValidationError(
-                        f"Field '{field}' expected type {expected_type}, got {type(value)}"
-                    )
+        for field, value in data.items():
+            check = checks.get(field)
+            if check is not None and not isinstance(value, check[1]):
+                self._raise_invalid(field, check[0], value)
+    
+    def _validate_field(self, field: str, value: Any) -> None:
+        """Validate a single field value against its type hint."""
+        check = self._field_checks().get(field)
+        if check is not None and not isinstance(value, check[1]):
+            self._raise_invalid(field, check[0], value)
+    
+    @staticmethod
+    def _raise_invalid(field: str, expected_type: Type, value: Any) -> None:
+        raise StateValidationError(
+            f"Field '{field}' expected type {expected_type}, got {type(value)}"
+        )
     
     def _is_valid_type(self, value: Any, expected_type: Type) -> bool:
         """Check if value matches expected type."""
-        origin = get_origin(expected_type)
-        
-        if origin is not None:
-            # Handle generic types like Dict[str, Any]
-            args = get_args(expected_type)
-            if origin is dict:
-                return isinstance(value, dict)
-            elif origin is list:
-                return isinstance(value, list)
-        
-        return isinstance(value, expected_type)
+        return isinstance(value, _check_target(expected_type))
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get value from state."""
@@ -54,33 +92,41 @@ class StateSchema:
     
     def set(self, key: str, value: Any) -> 'StateSchema':
         """Create new state with updated value (immutable)."""
-        new_data = deepcopy(self._data)
+        # Only the new value needs validating; the rest already passed
+        self._validate_field(key, value)
+        new_data = self._data.copy()
         new_data[key] = value
-        
-        # Validate the new data
-        type_hints = get_type_hints(self.__class__)
-        if key in type_hints and not self._is_valid_type(value, type_hints[key]):
-            raise StateValidationError(
-                f"Field '{key}' expected type {type_hints[key]}, got {type(value)}"
-            )
-        
-        return self.__class__(**new_data)
+        return self._unsafe_new(new_data)
     
     def update(self, **kwargs) -> 'StateSchema':
         """Create new state with multiple updates (immutable)."""
-        new_data = {**self._data, **kwargs}
-        return self.__class__(**new_data)
+        self._validate_types(kwargs)
+        return self._unsafe_new({**self._data, **kwargs})
+    
+    def clone(self) -> 'StateSchema':
+        """Create an independent deep copy of this state."""
+        return self._unsafe_new(deepcopy(self._data))
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert state to dictionary."""
+        """Convert state to dictionary.
+        
+        The dict itself is new, but nested values are shared with the state
+        and must not be mutated; use ``deep_to_dict`` for a fully owned copy.
+        """
+        return dict(self._data)
+    
+    def deep_to_dict(self) -> Dict[str, Any]:
+        """Convert state to a deep-copied dictionary."""
         return deepcopy(self._data)
     
     def to_json(self) -> str:
         """Convert state to JSON string."""
-        return json.dumps(self._data, indent=2)
+        return orjson.dumps(self._data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
     
     def __eq__(self, other) -> bool:
         """Check equality with another state."""
+        if self is other:
+            return True
         if not isinstance(other, self.__class__):
             return False
         return self._data == other._data
@@ -98,6 +144,8 @@ class AgentState(StateSchema):
     intermediate_steps: list
     is_complete: bool
     
+    __slots__ = ("_last_index", "_assistant_count")
+    
     def __init__(self, 
                  messages: list = None,
                  tool_calls: list = None,
@@ -110,46 +158,118 @@ class AgentState(StateSchema):
             intermediate_steps=intermediate_steps or [],
             is_complete=is_complete
         )
+        # Role index over messages, built lazily and carried by add_message
+        self._last_index: Optional[Dict[str, int]] = None
+        self._assistant_count = 0
+    
+    @classmethod
+    def _unsafe_new(cls, data: Dict[str, Any]) -> 'AgentState':
+        """Create a state around already-validated data, with an empty role index."""
+        instance = super()._unsafe_new(data)
+        instance._last_index = None
+        instance._assistant_count = 0
+        return instance
     
     @property
     def messages(self) -> list:
         """Get messages."""
-        return self.get("messages", [])
+        return self._data.get("messages", [])
     
     @property
     def tool_calls(self) -> list:
         """Get tool calls."""
-        return self.get("tool_calls", [])
+        return self._data.get("tool_calls", [])
     
     @property
     def intermediate_steps(self) -> list:
         """Get intermediate steps."""
-        return self.get("intermediate_steps", [])
+        return self._data.get("intermediate_steps", [])
     
     @property
     def is_complete(self) -> bool:
         """Get completion status."""
-        return self.get("is_complete", False)
+        return self._data.get("is_complete", False)
+    
+    def _ensure_index(self) -> None:
+        """Build the role index for the current messages."""
+        if self._last_index is not None:
+            return
+        last_index = {}
+        assistant_count = 0
+        for i, msg in enumerate(self.messages):
+            last_index[msg["role"]] = i
+            if msg["role"] == "assistant":
+                assistant_count += 1
+        self._last_index = last_index
+        self._assistant_count = assistant_count
+    
+    def _last_content(self, role: str) -> Optional[str]:
+        """Get the content of the last message with the given role."""
+        self._ensure_index()
+        index = self._last_index.get(role)
+        if index is None:
+            return None
+        return self.messages[index]["content"]
+    
+    @property
+    def assistant_count(self) -> int:
+        """Get the number of assistant messages."""
+        self._ensure_index()
+        return self._assistant_count
+    
+    def last_user_message(self) -> Optional[str]:
+        """Get the content of the last user message, if any."""
+        return self._last_content("user")
+    
+    def last_assistant_message(self) -> Optional[str]:
+        """Get the content of the last assistant message, if any."""
+        return self._last_content("assistant")
+    
+    def update(self, **kwargs) -> 'AgentState':
+        """Create new state with multiple updates, keeping the role index."""
+        new_state = super().update(**kwargs)
+        if "messages" not in kwargs and self._last_index is not None:
+            new_state._last_index = self._last_index
+            new_state._assistant_count = self._assistant_count
+        return new_state
+    
+    def _append(self, field: str, item: Any) -> 'AgentState':
+        """Create new state with item appended to a list field.
+        
+        Earlier items are shared with this state and the new list is known
+        to be valid, so this skips ``update`` and its validation.
+        """
+        new_data = self._data.copy()
+        new_data[field] = [*self._data.get(field, ()), item]
+        new_state = self._unsafe_new(new_data)
+        new_state._last_index = self._last_index
+        new_state._assistant_count = self._assistant_count
+        return new_state
     
     def add_message(self, role: str, content: str) -> 'AgentState':
         """Add a message to the state."""
-        new_messages = self.messages + [{"role": role, "content": content}]
-        return self.update(messages=new_messages)
+        new_state = self._append("messages", {"role": role, "content": content})
+        
+        # Extend the role index instead of rescanning the messages later
+        if self._last_index is not None:
+            new_state._last_index = {**self._last_index, role: len(new_state.messages) - 1}
+            new_state._assistant_count = self._assistant_count + (role == "assistant")
+        return new_state
     
     def add_tool_call(self, tool_name: str, tool_args: Dict[str, Any]) -> 'AgentState':
         """Add a tool call to the state."""
-        new_tool_calls = self.tool_calls + [{"tool": tool_name, "args": tool_args}]
-        return self.update(tool_calls=new_tool_calls)
+        return self._append("tool_calls", {"tool": tool_name, "args": tool_args})
     
     def add_intermediate_step(self, step: Dict[str, Any]) -> 'AgentState':
         """Add an intermediate step to the state."""
-        new_steps = self.intermediate_steps + [step]
-        return self.update(intermediate_steps=new_steps)
+        return self._append("intermediate_steps", step)
 
 
 class GraphState(StateSchema):
     """Generic state schema for graph execution."""
     
+    __slots__ = ()
+    
     current_node: str
     next_node: str
     context: Dict[str, Any]
@@ -171,22 +291,22 @@ class GraphState(StateSchema):
     @property
     def current_node(self) -> str:
         """Get current node."""
-        return self.get("current_node", "")
+        return self._data.get("current_node", "")
     
     @property
     def next_node(self) -> str:
         """Get next node."""
-        return self.get("next_node", "")
+        return self._data.get("next_node", "")
     
     @property
     def context(self) -> Dict[str, Any]:
         """Get context."""
-        return self.get("context", {})
+        return self._data.get("context", {})
     
     @property
     def results(self) -> Dict[str, Any]:
         """Get results."""
-        return self.get("results", {})
+        return self._data.get("results", {})
     
     def set_current_node(self, node_name: str) -> 'GraphState':
         """Set the current node."""
@@ -196,12 +316,28 @@ class GraphState(StateSchema):
         """Set the next node."""
         return self.update(next_node=node_name)
     
+    def _merge(self, field: str, items: Dict[str, Any]) -> 'GraphState':
+        """Create new state with ``items`` merged into a dict field.
+        
+        Other entries are shared with this state and the new dict is known
+        to be valid, so this skips ``update`` and its validation.
+        """
+        new_data = self._data.copy()
+        new_data[field] = {**self._data.get(field, {}), **items}
+        return self._unsafe_new(new_data)
+    
     def add_context(self, key: str, value: Any) -> 'GraphState':
         """Add context information."""
-        new_context = {**self.context, key: value}
-        return self.update(context=new_context)
+        return self._merge("context", {key: value})
     
     def add_result(self, key: str, value: Any) -> 'GraphState':
         """Add execution result."""
-        new_results = {**self.results, key: value}
-        return self.update(results=new_results)
\ No newline at end of file
+        return self._merge("results", {key: value})
+    
+    def extend_context(self, context: Dict[str, Any]) -> 'GraphState':
+        """Add several context entries with a single copy of the state."""
+        return self._merge("context", context)
+    
+    def extend_results(self, results: Dict[str, Any]) -> 'GraphState':
+        """Add several execution results with a single copy of the state."""
+        return self._merge("results", results)
\ No newline at end of file
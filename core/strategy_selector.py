@@ -1,16 +1,24 @@
 """Configuration-driven strategy selection."""
 
 import os
-from typing import Optional
+import threading
+from typing import Dict, Optional
 from core.execution import StrategyFactory, ExecutionStrategy
 
 
+# Strategy names accepted from requests and headers
+_ALLOWED_STRATEGIES = frozenset(("traditional", "compiled", "auto"))
+
+
 class StrategySelector:
     """Multi-level strategy selection with fallback."""
     
     def __init__(self):
         self.default_strategy = os.getenv("DEFAULT_STRATEGY", "traditional")
         self.enable_auto_switch = os.getenv("AUTO_STRATEGY", "false").lower() == "true"
+        # One strategy instance per type, shared by every request
+        self._strategies: Dict[str, ExecutionStrategy] = {}
+        self._strategies_lock = threading.Lock()
     
     def select_strategy(self, 
                        request_strategy: Optional[str] = None,
@@ -19,35 +27,46 @@ class StrategySelector:
         """Select execution strategy with multi-level fallback."""
         
         # Level 1: Request-level explicit specification
-        if request_strategy and request_strategy in ["traditional", "compiled", "auto"]:
+        if request_strategy in _ALLOWED_STRATEGIES:
             return request_strategy
         
         # Level 2: Header-level specification
-        if header_strategy and header_strategy in ["traditional", "compiled", "auto"]:
+        if header_strategy in _ALLOWED_STRATEGIES:
             return header_strategy
         
         # Level 3: Auto-selection based on complexity
         if self.enable_auto_switch and request_complexity:
-            if request_complexity > 7:  # High complexity
-                return "compiled"
-            elif request_complexity < 3:  # Low complexity  
-                return "traditional"
-            else:  # Medium complexity
-                return "compiled"  # Default to compiled for medium
+            # Low complexity stays traditional; medium and high use compiled
+            return "traditional" if request_complexity < 3 else "compiled"
         
         # Level 4: Environment configuration
         return self.default_strategy
     
     def create_strategy(self, **kwargs) -> 'ExecutionStrategy':
-        """Create strategy instance based on selection."""
+        """Get the strategy instance for the selected type.
+        
+        Instances are created on first use and reused afterwards, so the
+        compiled strategy's graph cache and the statistics persist across
+        requests. Strategies are thread-safe to share, and the compiled
+        graph cache is keyed per agent, so pooled agents built alike still
+        run their own graphs.
+        """
         strategy_type = self.select_strategy(**kwargs)
-        if strategy_type == "auto":
-            return StrategyFactory.create_best_automatic()
-        elif strategy_type == "traditional":
-            return StrategyFactory.create_traditional()
-        elif strategy_type == "compiled":
-            return StrategyFactory.create_compiled()
-        else:
+        strategy = self._strategies.get(strategy_type)
+        if strategy is None:
+            with self._strategies_lock:
+                strategy = self._strategies.get(strategy_type)
+                if strategy is None:
+                    strategy = self._build_strategy(strategy_type)
+                    self._strategies[strategy_type] = strategy
+        return strategy
+    
+    @staticmethod
+    def _build_strategy(strategy_type: str) -> 'ExecutionStrategy':
+        """Create a new strategy instance of the given type."""
+        try:
+            return StrategyFactory.create(strategy_type)
+        except ValueError:
             # Default to traditional for invalid strategy types
             return StrategyFactory.create_traditional()
 
@@ -0,0 +1,6 @@
+"""Shared pytest configuration."""
+
+
+def pytest_configure(config):
+    """Register markers used by optional plugins so runs without them stay clean."""
+    config.addinivalue_line("markers", "xdist_group(name): run tests of a group on the same pytest-xdist worker")
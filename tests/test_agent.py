@@ -1,9 +1,11 @@
 """Tests for agent functionality."""
 
+import re
 import pytest
-from agents.simple import SimpleAgent
-from agents.base import SimpleTool, ToolResult
+from agents.simple import SimpleAgent, _extract_arg
+from agents.base import SimpleTool, ToolResult, AgentStep
 from core.state import AgentState
+from core.nodes import calculator_tool, weather_tool, search_tool
 
 
 class TestSimpleTool:
@@ -41,6 +43,49 @@ class TestSimpleTool:
             tool.execute()
 
 
+class TestBuiltinTools:
+    """Test the built-in tool functions."""
+    
+    def test_tools_cache_results(self):
+        """Test that repeated inputs reuse cached results."""
+        calculator_tool.cache_clear()
+        assert calculator_tool("2 + 2") == 4.0
+        assert calculator_tool("2 + 2") == 4.0
+        assert calculator_tool.cache_info().hits == 1
+        
+        assert weather_tool("Beijing") == "Sunny, 25°C"
+        assert weather_tool("Mars") == "Weather data not available for Mars"
+    
+    def test_search_tool_returns_fresh_list(self):
+        """Test that cached search results can't be mutated by callers."""
+        results = search_tool("python")
+        results.append("extra")
+        assert search_tool("python") == [
+            "Search result 1 for: python",
+            "Search result 2 for: python",
+            "Search result 3 for: python"
+        ]
+    
+    def test_calculator_tool_arithmetic(self):
+        """Test the supported arithmetic operators."""
+        assert calculator_tool("(1 + 2) * 3") == 9.0
+        assert calculator_tool("10 / 4") == 2.5
+        assert calculator_tool("7 // 2") == 3.0
+        assert calculator_tool("7 % 4") == 3.0
+        assert calculator_tool("2 ** 3") == 8.0
+        assert calculator_tool("-1.5 + +2") == 0.5
+    
+    def test_calculator_tool_error(self):
+        """Test that invalid expressions raise ValueError every time."""
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Cannot evaluate expression"):
+                calculator_tool("2 +")
+        
+        for expression in ("1 / 0", "__import__('os')", "x + 1", "'a' * 3", "1 < 2"):
+            with pytest.raises(ValueError, match="Cannot evaluate expression"):
+                calculator_tool(expression)
+
+
 class TestToolResult:
     """Test ToolResult functionality."""
     
@@ -74,13 +119,41 @@ class TestToolResult:
         }
 
 
+class TestAgentStep:
+    """Test AgentStep functionality."""
+    
+    def test_to_dict(self):
+        """Test agent step dictionary conversion."""
+        step = AgentStep("tool", "Used tools", [
+            ToolResult("calculator", 4.0),
+            ToolResult("weather", None, "unavailable")
+        ])
+        
+        assert step.to_dict() == {
+            "type": "tool",
+            "content": "Used tools",
+            "tool_results": [
+                {"tool": "calculator", "result": 4.0, "error": None},
+                {"tool": "weather", "result": None, "error": "unavailable"}
+            ]
+        }
+
+
+@pytest.fixture(scope="module")
+def agent():
+    """Create one SimpleAgent shared by tests that don't modify it."""
+    return SimpleAgent()
+
+
 class TestSimpleAgent:
-    """Test SimpleAgent functionality."""
+    """Test SimpleAgent functionality.
+    
+    Tests that rename the agent, change its limits or tools, or patch its
+    methods build their own instance instead of using the shared fixture.
+    """
     
-    def test_agent_creation(self):
+    def test_agent_creation(self, agent):
         """Test agent creation."""
-        agent = SimpleAgent()
-        
         assert agent.name == "simple_agent"
         assert len(agent.tools) == 3  # calculator, weather, search
         assert "calculator" in agent.tools
@@ -107,109 +180,142 @@ class TestSimpleAgent:
         assert agent.get_tool("test_tool") == tool
         assert len(agent.list_tools()) == 4
     
-    def test_get_nonexistent_tool(self):
+    def test_get_nonexistent_tool(self, agent):
         """Test getting nonexistent tool."""
-        agent = SimpleAgent()
-        
         assert agent.get_tool("nonexistent") is None
     
-    def test_should_use_tool(self):
-        """Test tool usage detection."""
-        agent = SimpleAgent()
-        
+    @pytest.mark.parametrize("query,expected", [
         # Calculator queries
-        assert agent._should_use_tool("calculate 2+2") is True
-        assert agent._should_use_tool("what is 5 * 3") is True
-        assert agent._should_use_tool("compute 10 / 2") is True
-        
+        ("calculate 2+2", True),
+        ("what is 5 * 3", True),
+        ("compute 10 / 2", True),
         # Weather queries
-        assert agent._should_use_tool("weather in beijing") is True
-        assert agent._should_use_tool("temperature in shanghai") is True
-        
+        ("weather in beijing", True),
+        ("temperature in shanghai", True),
         # Search queries
-        assert agent._should_use_tool("search for python") is True
-        assert agent._should_use_tool("find information about AI") is True
-        
+        ("search for python", True),
+        ("find information about AI", True),
         # Non-tool queries
-        assert agent._should_use_tool("hello") is False
-        assert agent._should_use_tool("how are you") is False
-        assert agent._should_use_tool("what is your name") is False
+        ("hello", False),
+        ("how are you", False),
+        ("what is your name", False),
+    ])
+    def test_should_use_tool(self, agent, query, expected):
+        """Test tool usage detection."""
+        assert agent._should_use_tool(query) is expected
     
-    def test_extract_tool_args_calculator(self):
+    @pytest.mark.parametrize("query,expected", [
+        ("calculate 2+2", {"expression": "2+2"}),
+        ("what is 5 * 3", {"expression": "5 * 3"}),
+        ("compute 10 / 2", {"expression": "10 / 2"}),
+        ("2+2=?", {"expression": "2+2"}),  # Fixed: should be 2+2 not 22
+        ("calculate (1 + 2) * 3", {"expression": "(1 + 2) * 3"})  # Fixed: should keep operators
+    ])
+    def test_extract_tool_args_calculator(self, agent, query, expected):
         """Test extracting calculator arguments."""
-        agent = SimpleAgent()
-        
-        # Various calculator query formats
-        test_cases = [
-            ("calculate 2+2", {"expression": "2+2"}),
-            ("what is 5 * 3", {"expression": "5 * 3"}),
-            ("compute 10 / 2", {"expression": "10 / 2"}),
-            ("2+2=?", {"expression": "2+2"}),  # Fixed: should be 2+2 not 22
-            ("calculate (1 + 2) * 3", {"expression": "(1 + 2) * 3"})  # Fixed: should keep operators
-        ]
-        
-        for query, expected in test_cases:
-            args = agent._extract_tool_args(query, "calculator")
-            if expected["expression"]:  # Only check if we got a valid expression
-                assert "expression" in args
-                assert args["expression"] == expected["expression"]
+        args = agent._extract_tool_args(query, "calculator")
+        assert "expression" in args
+        assert args["expression"] == expected["expression"]
     
-    def test_extract_tool_args_weather(self):
+    @pytest.mark.parametrize("query,expected", [
+        ("weather in beijing", {"location": "beijing"}),
+        ("what's the weather in shanghai", {"location": "shanghai"}),
+        ("temperature in guangzhou", {"location": "guangzhou"}),
+        ("weather shenzhen", {"location": "shenzhen"})
+    ])
+    def test_extract_tool_args_weather(self, agent, query, expected):
         """Test extracting weather arguments."""
-        agent = SimpleAgent()
-        
-        # Various weather query formats
-        test_cases = [
-            ("weather in beijing", {"location": "beijing"}),
-            ("what's the weather in shanghai", {"location": "shanghai"}),
-            ("temperature in guangzhou", {"location": "guangzhou"}),
-            ("weather shenzhen", {"location": "shenzhen"})
-        ]
-        
-        for query, expected in test_cases:
-            args = agent._extract_tool_args(query, "weather")
-            assert args == expected
+        assert agent._extract_tool_args(query, "weather") == expected
     
-    def test_extract_tool_args_search(self):
+    @pytest.mark.parametrize("query,expected", [
+        ("search for python programming", {"query": "python programming"}),
+        ("search AI information", {"query": "AI information"}),
+        ("find details about machine learning", {"query": "details about machine learning"}),
+        ("look up python tutorials", {"query": "python tutorials"})
+    ])
+    def test_extract_tool_args_search(self, agent, query, expected):
         """Test extracting search arguments."""
-        agent = SimpleAgent()
-        
-        # Various search query formats
-        test_cases = [
-            ("search for python programming", {"query": "python programming"}),
-            ("search AI information", {"query": "AI information"}),
-            ("find details about machine learning", {"query": "details about machine learning"}),
-            ("look up python tutorials", {"query": "python tutorials"})
-        ]
-        
-        for query, expected in test_cases:
-            args = agent._extract_tool_args(query, "search")
-            assert args == expected
+        assert agent._extract_tool_args(query, "search") == expected
     
-    def test_choose_tool(self):
+    @pytest.mark.parametrize("query,expected", [
+        # Calculator selection
+        ("calculate 2+2", "calculator"),
+        ("what is 5 * 3", "calculator"),
+        # Weather selection
+        ("weather in beijing", "weather"),
+        ("temperature in shanghai", "weather"),
+        # Search selection
+        ("search for python", "search"),
+        ("find information about AI", "search"),
+        # No tool selection
+        ("hello", None),
+        ("how are you", None),
+    ])
+    def test_choose_tool(self, agent, query, expected):
         """Test tool selection."""
-        agent = SimpleAgent()
-        
-        # Test calculator selection
-        assert agent._choose_tool("calculate 2+2") == "calculator"
-        assert agent._choose_tool("what is 5 * 3") == "calculator"
+        assert agent._choose_tool(query) == expected
+    
+    def test_patterns_precompiled(self, agent, monkeypatch):
+        """Test tool detection and argument extraction never compile regexes."""
+        def fail_compile(*args, **kwargs):
+            raise AssertionError("regex compiled per call")
+        
+        monkeypatch.setattr(re, "compile", fail_compile)
+        monkeypatch.setattr(re, "search", fail_compile)
+        monkeypatch.setattr(re, "match", fail_compile)
+        
+        assert agent._should_use_tool("calculate 7 * 6") is True
+        assert agent._extract_tool_args("calculate 7 * 6", "calculator") == {"expression": "7 * 6"}
+        assert agent._extract_tool_args("weather in beijing", "weather") == {"location": "beijing"}
+        assert agent._extract_tool_args("search for python", "search") == {"query": "python"}
+    
+    def test_extract_tool_args_cached(self, agent):
+        """Test that repeated extractions are cached but return fresh dicts."""
+        _extract_arg.cache_clear()
+        args = agent._extract_tool_args("weather in beijing", "weather")
+        args["location"] = "changed"
+        
+        assert agent._extract_tool_args("weather in beijing", "weather") == {"location": "beijing"}
+        assert _extract_arg.cache_info().hits == 1
+        assert agent._extract_tool_args("weather in beijing", "unknown") == {}
+    
+    def test_dispatch(self, agent):
+        """Test single-pass tool and argument selection."""
+        assert agent._dispatch("calculate 2+2") == ("calculator", {"expression": "2+2"})
+        assert agent._dispatch("2+2=?") == ("calculator", {"expression": "2+2"})
+        assert agent._dispatch("what's the weather in shanghai") == ("weather", {"location": "shanghai"})
+        assert agent._dispatch("look up python tutorials") == ("search", {"query": "python tutorials"})
+        
+        # Weather takes priority over search regardless of position
+        assert agent._dispatch("find the weather in beijing") == ("weather", {"location": "beijing"})
+        
+        # No tool
+        assert agent._dispatch("hello") == (None, {})
+        assert agent._dispatch("calculate something") == (None, {})
+    
+    def test_dispatch_falls_through_to_next_tool(self, agent):
+        """Test that an empty match or unregistered tool tries the next tool."""
+        # Calculator matches but its cleaned expression is empty
+        assert agent._dispatch("Please search the web, then calculate stuff") == (
+            "search", {"query": "the web, then calculate stuff"}
+        )
         
-        # Test weather selection
-        assert agent._choose_tool("weather in beijing") == "weather"
-        assert agent._choose_tool("temperature in shanghai") == "weather"
+        # Trailing "=?" on a later line still selects the calculator
+        assert agent._dispatch("line1\n3+4=?") == ("calculator", {"expression": "3+4"})
         
-        # Test search selection
-        assert agent._choose_tool("search for python") == "search"
-        assert agent._choose_tool("find information about AI") == "search"
+    def test_dispatch_skips_unregistered_tool(self):
+        """Test that an unregistered tool falls through to the next tool."""
+        agent = SimpleAgent()
+        del agent.tools["calculator"]
         
-        # Test no tool selection
-        assert agent._choose_tool("hello") is None
-        assert agent._choose_tool("how are you") is None
+        assert agent._dispatch("calculate 2+2 weather in beijing") == ("weather", {"location": "beijing"})
+    
+    def test_run_multiline_calculation(self, agent):
+        """Test that a calculation on a later line is executed."""
+        assert agent.run("line1\n3+4=?").endswith("Tool result: 7.0")
     
-    def test_generate_response_with_tool_results(self):
+    def test_generate_response_with_tool_results(self, agent):
         """Test response generation with tool results."""
-        agent = SimpleAgent()
-        
         state = AgentState(
             messages=[{"role": "user", "content": "calculate 2+2"}],
             intermediate_steps=[
@@ -220,10 +326,8 @@ class TestSimpleAgent:
         response = agent._generate_response(state)
         assert "Tool result: 4" in response
     
-    def test_generate_response_greeting(self):
+    def test_generate_response_greeting(self, agent):
         """Test response generation for greetings."""
-        agent = SimpleAgent()
-        
         state = AgentState(
             messages=[{"role": "user", "content": "hello"}]
         )
@@ -234,10 +338,8 @@ class TestSimpleAgent:
         assert "weather" in response.lower()
         assert "search" in response.lower()
     
-    def test_generate_response_thanks(self):
+    def test_generate_response_thanks(self, agent):
         """Test response generation for thanks."""
-        agent = SimpleAgent()
-        
         state = AgentState(
             messages=[{"role": "user", "content": "thank you"}]
         )
@@ -245,10 +347,8 @@ class TestSimpleAgent:
         response = agent._generate_response(state)
         assert "You're welcome" in response
     
-    def test_generate_response_goodbye(self):
+    def test_generate_response_goodbye(self, agent):
         """Test response generation for goodbye."""
-        agent = SimpleAgent()
-        
         state = AgentState(
             messages=[{"role": "user", "content": "goodbye"}]
         )
@@ -271,10 +371,8 @@ class TestSimpleAgent:
         state = AgentState(messages=messages)
         assert agent._should_continue(state) is False
     
-    def test_should_complete(self):
+    def test_should_complete(self, agent):
         """Test completion check."""
-        agent = SimpleAgent()
-        
         # Completed state
         state = AgentState(is_complete=True)
         assert agent._should_continue(state) is False
@@ -283,20 +381,16 @@ class TestSimpleAgent:
         state = AgentState(is_complete=False)
         assert agent._should_continue(state) is True
     
-    def test_process_input(self):
+    def test_process_input(self, agent):
         """Test input processing."""
-        agent = SimpleAgent()
-        
         state = agent.process_input("hello world")
         
         assert isinstance(state, AgentState)
         assert len(state.messages) == 1
         assert state.messages[0] == {"role": "user", "content": "hello world"}
     
-    def test_format_output(self):
+    def test_format_output(self, agent):
         """Test output formatting."""
-        agent = SimpleAgent()
-        
         # State with assistant messages
         messages = [
             {"role": "user", "content": "hello"},
@@ -312,10 +406,8 @@ class TestSimpleAgent:
         output = agent.format_output(state)
         assert output == "No response generated."
     
-    def test_create_graph(self):
+    def test_create_graph(self, agent):
         """Test graph creation."""
-        agent = SimpleAgent()
-        
         graph = agent.create_graph()
         
         assert graph.name == "simple_agent_graph"
@@ -323,30 +415,45 @@ class TestSimpleAgent:
         assert graph.entry_point == "input"
         assert len(graph.edges) == 7
     
-    def test_run_simple_conversation(self):
-        """Test running a simple conversation."""
+    def test_create_graph_cached(self):
+        """Test that the graph is built once and reused."""
         agent = SimpleAgent()
         
+        graph = agent.create_graph()
+        assert agent.create_graph() is graph
+        
+        # Renaming the agent rebuilds the graph
+        agent.name = "renamed_agent"
+        renamed_graph = agent.create_graph()
+        assert renamed_graph is not graph
+        assert renamed_graph.name == "renamed_agent_graph"
+    
+    def test_run_simple_conversation(self, agent):
+        """Test running a simple conversation."""
         response = agent.run("hello")
         
         assert isinstance(response, str)
         assert len(response) > 0
         assert "hello" in response.lower() or "Hello!" in response or "help you" in response.lower()
     
-    def test_run_tool_query(self):
-        """Test running a tool query."""
+    def test_run_uses_current_tools(self):
+        """Test that repeated inputs see tools replaced on the agent in between."""
         agent = SimpleAgent()
+        assert agent.run("calculate 2+2").endswith("Tool result: 4.0")
         
+        agent.tools["calculator"] = SimpleTool("calculator", "Always 42", lambda expression: 42)
+        assert agent.run("calculate 2+2").endswith("Tool result: 42")
+    
+    def test_run_tool_query(self, agent):
+        """Test running a tool query."""
         response = agent.run("calculate 2+2")
         
         assert isinstance(response, str)
         assert len(response) > 0
         # Should contain tool result information
     
-    def test_analyze_input_node(self):
+    def test_analyze_input_node(self, agent):
         """Test the analyze input node function."""
-        agent = SimpleAgent()
-        
         # Test with tool query
         state = AgentState(messages=[{"role": "user", "content": "calculate 2+2"}])
         result_state = agent._analyze_input(state)
@@ -360,10 +467,8 @@ class TestSimpleAgent:
         
         assert len(result_state.tool_calls) == 0
     
-    def test_use_tool_node(self):
+    def test_use_tool_node(self, agent):
         """Test the use tool node function."""
-        agent = SimpleAgent()
-        
         # Test with valid tool call
         state = AgentState(tool_calls=[{"tool": "calculator", "args": {"expression": "2+2"}}])
         result_state = agent._use_tool_node(state)
@@ -379,10 +484,23 @@ class TestSimpleAgent:
         # Should not add intermediate steps for invalid tool
         assert len(result_state.intermediate_steps) == 0
     
-    def test_respond_node(self):
-        """Test the respond node function."""
-        agent = SimpleAgent()
+    def test_use_tool_node_multiple_calls(self, agent):
+        """Test that multiple tool calls all execute, in call order."""
+        state = AgentState(tool_calls=[
+            {"tool": "calculator", "args": {"expression": "2+2"}},
+            {"tool": "weather", "args": {"location": "beijing"}},
+            {"tool": "calculator", "args": {"expression": "1/0"}}
+        ])
+        result_state = agent._use_tool_node(state)
         
+        steps = result_state.intermediate_steps
+        assert [step["tool"] for step in steps] == ["calculator", "weather", "calculator"]
+        assert steps[0]["result"] == 4.0
+        assert steps[1]["result"] == "Sunny, 25°C"
+        assert "error" in steps[2]
+    
+    def test_respond_node(self, agent):
+        """Test the respond node function."""
         state = AgentState(messages=[{"role": "user", "content": "hello"}])
         result_state = agent._respond_node(state)
         
@@ -390,10 +508,8 @@ class TestSimpleAgent:
         assert result_state.messages[1]["role"] == "assistant"
         assert len(result_state.messages[1]["content"]) > 0
     
-    def test_check_complete_node(self):
+    def test_check_complete_node(self, agent):
         """Test the check complete node function."""
-        agent = SimpleAgent()
-        
         # Test incomplete state
         state = AgentState()
         result_state = agent._check_complete_node(state)
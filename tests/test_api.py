@@ -1,50 +1,84 @@
 """Tests for API endpoints."""
 
+import asyncio
+import httpx
+import orjson
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
 from api.app import create_app
 
 
-@pytest.fixture
-def client():
-    """Create test client."""
-    app = create_app()
-    return TestClient(app)
+# Keep API tests on one xdist worker so they share the module-scoped app
+pytestmark = [pytest.mark.asyncio, pytest.mark.xdist_group("api")]
+
+
+@pytest.fixture(scope="module")
+def app():
+    """Create one app shared by every test in the module, without API docs."""
+    return create_app(enable_docs=False)
+
+
+@pytest_asyncio.fixture
+async def client(app):
+    """Create an async client that calls the app directly over ASGI."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", follow_redirects=True) as async_client:
+        yield async_client
 
 
 class TestHealthEndpoints:
     """Test health check endpoints."""
     
-    def test_health_check(self, client):
+    async def test_health_check(self, client):
         """Test health check endpoint."""
-        response = client.get("/health")
+        response = await client.get("/health")
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["status"] == "healthy"
         assert "message" in data
     
-    def test_api_health_check(self, client):
+    async def test_api_health_check(self, client):
         """Test API health check endpoint."""
-        response = client.get("/api/v1/health")
+        response = await client.get("/api/v1/health")
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["status"] == "healthy"
         assert "timestamp" in data
         assert "agents" in data
         assert data["ready"] is True
 
 
+class TestAppFactory:
+    """Test create_app options."""
+    
+    async def test_docs_disabled(self, client):
+        """Test that the test app skips the OpenAPI docs routes."""
+        for path in ("/docs", "/redoc", "/openapi.json"):
+            response = await client.get(path)
+            assert response.status_code == 404
+        
+        response = await client.get("/")
+        assert orjson.loads(response.content)["docs"] is None
+    
+    async def test_docs_enabled_by_default(self):
+        """Test that the default app serves the OpenAPI docs routes."""
+        app = create_app()
+        assert app.docs_url == "/docs"
+        assert app.redoc_url == "/redoc"
+        assert app.openapi_url == "/openapi.json"
+
+
 class TestAgentEndpoints:
     """Test agent-related endpoints."""
     
-    def test_list_agents(self, client):
+    async def test_list_agents(self, client):
         """Test listing available agents."""
-        response = client.get("/api/v1/agents")
+        response = await client.get("/api/v1/agents")
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "agents" in data
         assert len(data["agents"]) > 0
         
@@ -53,12 +87,12 @@ class TestAgentEndpoints:
         assert "description" in agent
         assert "tools" in agent
     
-    def test_get_agent_tools(self, client):
+    async def test_get_agent_tools(self, client):
         """Test getting tools for specific agent."""
-        response = client.get("/api/v1/agents/simple/tools")
+        response = await client.get("/api/v1/agents/simple/tools")
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["agent"] == "simple"
         assert "tools" in data
         assert len(data["tools"]) > 0
@@ -67,77 +101,94 @@ class TestAgentEndpoints:
         assert "name" in tool
         assert "description" in tool
     
-    def test_get_nonexistent_agent_tools(self, client):
+    async def test_get_nonexistent_agent_tools(self, client):
         """Test getting tools for nonexistent agent."""
-        response = client.get("/api/v1/agents/nonexistent/tools")
+        response = await client.get("/api/v1/agents/nonexistent/tools")
         assert response.status_code == 404
 
 
 class TestChatEndpoints:
     """Test chat endpoints."""
     
-    def test_chat_with_simple_agent(self, client):
+    async def test_chat_with_simple_agent(self, client):
         """Test chatting with simple agent."""
-        response = client.post("/api/v1/chat", json={
+        response = await client.post("/api/v1/chat", json={
             "message": "hello",
             "agent_type": "simple"
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "response" in data
         assert data["agent_type"] == "simple"
         assert "timestamp" in data
         assert len(data["response"]) > 0
     
-    def test_chat_with_calculation(self, client):
+    async def test_chat_with_calculation(self, client):
         """Test chatting with calculation."""
-        response = client.post("/api/v1/chat", json={
+        response = await client.post("/api/v1/chat", json={
             "message": "calculate 2+2",
             "agent_type": "simple"
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "response" in data
         assert len(data["response"]) > 0
         # Should contain tool result information
     
-    def test_chat_with_weather_query(self, client):
+    async def test_chat_execution_stats_cover_one_request(self, client):
+        """Test that cache statistics describe the request, not the shared strategy's totals."""
+        for _ in range(3):
+            response = await client.post("/api/v1/chat", json={
+                "message": "hello",
+                "agent_type": "simple",
+                "strategy": "compiled"
+            })
+            assert response.status_code == 200
+            
+            data = orjson.loads(response.content)
+            stats = data["execution_stats"]
+            assert data["strategy_used"] == "compiled"
+            assert stats["cache_hits"] + stats["cache_misses"] == 1
+            assert stats["hit_rate"] == float(stats["cache_hits"])
+            assert stats["execution_time"] >= 0
+    
+    async def test_chat_with_weather_query(self, client):
         """Test chatting with weather query."""
-        response = client.post("/api/v1/chat", json={
+        response = await client.post("/api/v1/chat", json={
             "message": "weather in beijing",
             "agent_type": "simple"
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "response" in data
         assert len(data["response"]) > 0
     
-    def test_chat_with_search_query(self, client):
+    async def test_chat_with_search_query(self, client):
         """Test chatting with search query."""
-        response = client.post("/api/v1/chat", json={
+        response = await client.post("/api/v1/chat", json={
             "message": "search for python",
             "agent_type": "simple"
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "response" in data
         assert len(data["response"]) > 0
     
-    def test_chat_with_invalid_agent_type(self, client):
-        """Test chatting with invalid agent type."""
-        response = client.post("/api/v1/chat", json={
+    async def test_chat_with_invalid_agent_type(self, client):
+        """Test that unknown agent types are rejected during validation."""
+        response = await client.post("/api/v1/chat", json={
             "message": "hello",
             "agent_type": "nonexistent"
         })
-        assert response.status_code == 400
+        assert response.status_code == 422
     
-    def test_chat_with_empty_message(self, client):
+    async def test_chat_with_empty_message(self, client):
         """Test chatting with empty message."""
-        response = client.post("/api/v1/chat", json={
+        response = await client.post("/api/v1/chat", json={
             "message": "",
             "agent_type": "simple"
         })
@@ -148,41 +199,41 @@ class TestChatEndpoints:
 class TestExecuteEndpoints:
     """Test graph execution endpoints."""
     
-    def test_execute_simple_agent_graph(self, client):
+    async def test_execute_simple_agent_graph(self, client):
         """Test executing simple agent graph."""
-        response = client.post("/api/v1/execute", json={
+        response = await client.post("/api/v1/execute", json={
             "graph_type": "simple_agent",
             "input_data": {"message": "hello world"}
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["success"] is True
         assert "result" in data
         assert "execution_time" in data
         assert data["execution_time"] > 0
     
-    def test_execute_with_invalid_graph_type(self, client):
+    async def test_execute_with_invalid_graph_type(self, client):
         """Test executing with invalid graph type."""
-        response = client.post("/api/v1/execute", json={
+        response = await client.post("/api/v1/execute", json={
             "graph_type": "nonexistent",
             "input_data": {"message": "hello"}
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["success"] is False
         assert "error" in data
     
-    def test_execute_custom_graph(self, client):
+    async def test_execute_custom_graph(self, client):
         """Test executing custom graph."""
-        response = client.post("/api/v1/graph/execute", json={
+        response = await client.post("/api/v1/graph/execute", json={
             "graph_type": "simple_agent",
             "input_data": {"message": "hello world"}
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["success"] is True
         assert "result" in data
         assert data["graph_type"] == "simple_agent"
@@ -191,84 +242,45 @@ class TestExecuteEndpoints:
 class TestStateEndpoints:
     """Test state management endpoints."""
     
-    def test_get_state(self, client):
-        """Test getting state."""
-        response = client.post("/api/v1/state", json={
-            "state_data": {"test": "value"},
-            "operation": "get"
-        })
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert data["success"] is True
-        assert data["state"] == {"test": "value"}
-    
-    def test_set_agent_state(self, client):
-        """Test setting agent state."""
-        response = client.post("/api/v1/state", json={
-            "state_data": {
-                "messages": [{"role": "user", "content": "hello"}],
-                "tool_calls": [],
-                "intermediate_steps": [],
-                "is_complete": False
-            },
-            "operation": "set"
-        })
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert data["success"] is True
-        assert "state" in data
-        assert "messages" in data["state"]
-    
-    def test_set_graph_state(self, client):
-        """Test setting graph state."""
-        response = client.post("/api/v1/state", json={
-            "state_data": {
-                "current_node": "node1",
-                "next_node": "node2",
-                "context": {"input": "test"},
-                "results": {}
-            },
-            "operation": "set"
-        })
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert data["success"] is True
-        assert "state" in data
-        assert data["state"]["current_node"] == "node1"
-    
-    def test_update_state(self, client):
-        """Test updating state."""
-        response = client.post("/api/v1/state", json={
-            "state_data": {"test": "value"},
-            "operation": "update"
+    @pytest.mark.parametrize("operation,state_data,expected_success", [
+        ("get", {"test": "value"}, True),
+        ("set", {
+            "messages": [{"role": "user", "content": "hello"}],
+            "tool_calls": [],
+            "intermediate_steps": [],
+            "is_complete": False
+        }, True),
+        ("set", {
+            "current_node": "node1",
+            "next_node": "node2",
+            "context": {"input": "test"},
+            "results": {}
+        }, True),
+        ("update", {"test": "value"}, True),
+        ("invalid", {"test": "value"}, False),
+    ], ids=["get", "set_agent_state", "set_graph_state", "update", "invalid_operation"])
+    async def test_state_operation(self, client, operation, state_data, expected_success):
+        """Test state operations round-trip the state, or fail with an empty state."""
+        response = await client.post("/api/v1/state", json={
+            "state_data": state_data,
+            "operation": operation
         })
         assert response.status_code == 200
         
-        data = response.json()
-        assert data["success"] is True
-        assert data["state"] == {"test": "value"}
-    
-    def test_invalid_operation(self, client):
-        """Test invalid state operation."""
-        response = client.post("/api/v1/state", json={
-            "state_data": {"test": "value"},
-            "operation": "invalid"
-        })
-        assert response.status_code == 200
+        data = orjson.loads(response.content)
+        assert data["success"] is expected_success
+        assert data["state"] == (state_data if expected_success else {})
 
 
 class TestGraphEndpoints:
     """Test graph management endpoints."""
     
-    def test_validate_graph(self, client):
+    async def test_validate_graph(self, client):
         """Test graph validation."""
-        response = client.get("/api/v1/graph/validate")
+        response = await client.get("/api/v1/graph/validate")
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "graph_name" in data
         assert "nodes" in data
         assert "edges" in data
@@ -278,12 +290,12 @@ class TestGraphEndpoints:
         assert data["nodes"] > 0
         assert data["edges"] > 0
     
-    def test_visualize_graph(self, client):
+    async def test_visualize_graph(self, client):
         """Test graph visualization."""
-        response = client.get("/api/v1/graph/visualize")
+        response = await client.get("/api/v1/graph/visualize")
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "graph_name" in data
         assert "visualization" in data
         assert len(data["visualization"]) > 0
@@ -293,23 +305,23 @@ class TestGraphEndpoints:
 class TestWebInterface:
     """Test web interface accessibility."""
     
-    def test_serve_static_files(self, client):
+    async def test_serve_static_files(self, client):
         """Test serving static files."""
-        response = client.get("/web/")
+        response = await client.get("/web/")
         assert response.status_code == 200
         assert "text/html" in response.headers["content-type"]
     
-    def test_root_endpoint(self, client):
+    async def test_root_endpoint(self, client):
         """Test root endpoint."""
-        response = client.get("/")
+        response = await client.get("/")
         assert response.status_code == 200
         
         # The response should be JSON content
-        content = response.json()
+        content = orjson.loads(response.content)
         assert "LangGraph Toy API" in content["message"]
         
         # Test the web interface separately
-        response = client.get("/web/")
+        response = await client.get("/web/")
         assert response.status_code == 200
         content = response.text
         assert "LangGraph Toy" in content
@@ -319,17 +331,17 @@ class TestWebInterface:
 class TestErrorHandling:
     """Test error handling."""
     
-    def test_invalid_json(self, client):
+    async def test_invalid_json(self, client):
         """Test invalid JSON in request body."""
-        response = client.post("/api/v1/chat", data="invalid json")
+        response = await client.post("/api/v1/chat", content="invalid json")
         assert response.status_code == 422
     
-    def test_missing_required_fields(self, client):
+    async def test_missing_required_fields(self, client):
         """Test missing required fields."""
-        response = client.post("/api/v1/chat", json={"agent_type": "simple"})
+        response = await client.post("/api/v1/chat", json={"agent_type": "simple"})
         assert response.status_code == 422
     
-    def test_server_error_handling(self, client):
+    async def test_server_error_handling(self, client):
         """Test server error handling."""
         # This test would need to be customized based on potential error scenarios
         pass
@@ -338,32 +350,73 @@ class TestErrorHandling:
 class TestPerformance:
     """Test performance-related functionality."""
     
-    def test_execution_time_measurement(self, client):
+    async def test_execution_time_measurement(self, client):
         """Test that execution time is measured."""
-        response = client.post("/api/v1/execute", json={
+        response = await client.post("/api/v1/execute", json={
             "graph_type": "simple_agent",
             "input_data": {"message": "hello"}
         })
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "execution_time" in data
         assert isinstance(data["execution_time"], (int, float))
         assert data["execution_time"] >= 0
     
-    def test_multiple_requests(self, client):
+    async def test_multiple_requests(self, client):
         """Test handling multiple requests."""
-        responses = []
-        for i in range(5):
-            response = client.post("/api/v1/chat", json={
+        responses = await asyncio.gather(*[
+            client.post("/api/v1/chat", json={
                 "message": f"hello {i}",
                 "agent_type": "simple"
             })
-            responses.append(response)
+            for i in range(5)
+        ])
         
         # All requests should succeed
         for response in responses:
             assert response.status_code == 200
-            data = response.json()
+            data = orjson.loads(response.content)
             assert "response" in data
-            assert len(data["response"]) > 0
\ No newline at end of file
+            assert len(data["response"]) > 0
+    
+    async def test_concurrent_requests(self, client):
+        """Test handling many concurrent requests from an async client."""
+        responses = await asyncio.gather(*[
+            client.post("/api/v1/chat", json={
+                "message": f"calculate {i} + 1",
+                "agent_type": "simple"
+            })
+            for i in range(20)
+        ])
+        
+        for i, response in enumerate(responses):
+            assert response.status_code == 200
+            assert str(float(i + 1)) in orjson.loads(response.content)["response"]
+    
+    async def test_cancelled_waiter_returns_delivered_agent(self):
+        """Test that a waiter cancelled after delivery puts the agent back in the pool."""
+        from api import endpoints
+        idle = list(endpoints._idle_agents)
+        endpoints._idle_agents.clear()
+        
+        async def borrow():
+            async with endpoints.acquire_agent():
+                pass
+        
+        try:
+            task = asyncio.create_task(borrow())
+            await asyncio.sleep(0)
+            assert len(endpoints._agent_waiters) == 1
+            
+            # Deliver the agent, then cancel before the waiter resumes
+            endpoints._release_agent(idle[0])
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            
+            assert list(endpoints._idle_agents) == [idle[0]]
+        finally:
+            endpoints._idle_agents.clear()
+            endpoints._idle_agents.extend(idle)
@@ -1,12 +1,43 @@
 """Tests for compilation functionality."""
 
 import pytest
+from agents.base import BaseAgent
 from agents.simple import SimpleAgent
+from core.graph import Graph
+from core.state import AgentState
+from core import execution
 from core.execution import TraditionalStrategy, CompiledStrategy, StrategyFactory, ExecutionBenchmark
 from core.compilation import compile, AgentCompiler, CompiledAgent
 import time
 
 
+class EchoAgent(BaseAgent):
+    """Minimal agent that replies with the user's message."""
+    
+    def __init__(self):
+        """Initialize the agent without tools."""
+        super().__init__("echo_agent")
+    
+    def create_graph(self) -> Graph:
+        """Build a single-node graph on every call."""
+        graph = Graph("echo_graph")
+        graph.add_node("echo", self._echo)
+        graph.set_entry_point("echo")
+        return graph
+    
+    def _echo(self, state: AgentState) -> AgentState:
+        """Echo the last message back as the assistant."""
+        return state.add_message("assistant", state.messages[-1]["content"])
+    
+    def process_input(self, user_input: str) -> AgentState:
+        """Wrap the input in a user message."""
+        return AgentState(messages=[{"role": "user", "content": user_input}])
+    
+    def format_output(self, state: AgentState) -> str:
+        """Return the assistant's reply."""
+        return state.last_assistant_message()
+
+
 class TestTraditionalStrategy:
     """Test traditional execution strategy."""
     
@@ -42,6 +73,29 @@ class TestTraditionalStrategy:
         assert stats["execution_count"] == 2
         assert stats["total_time"] > 0.0
         assert stats["avg_time"] > 0.0
+    
+    def test_traditional_strategy_rebuilds_graph(self, monkeypatch):
+        """Test that each execution runs a newly built graph, not the cached one."""
+        agent = SimpleAgent()
+        strategy = StrategyFactory.create_traditional()
+        built = []
+        build_graph = agent.build_graph
+        monkeypatch.setattr(agent, "build_graph", lambda: built.append(build_graph()) or built[-1])
+        
+        strategy.execute(agent, "Hello")
+        strategy.execute(agent, "Hello")
+        
+        assert len(built) == 2
+        assert built[0] is not built[1]
+        assert agent.create_graph() not in built
+    
+    def test_strategies_run_agents_without_graph_cache(self):
+        """Test that strategies work with an agent relying on the default build_graph."""
+        agent = EchoAgent()
+        
+        assert StrategyFactory.create_traditional().execute(agent, "ping") == "ping"
+        assert AgentCompiler.compile(agent, strategy="traditional").run("ping") == "ping"
+        assert AgentCompiler.compile(agent, strategy="compiled").run("ping") == "ping"
 
 
 class TestCompiledStrategy:
@@ -82,6 +136,67 @@ class TestCompiledStrategy:
         assert strategy.cache_misses == 1  # Should still be 1
         assert strategy.cache_hits == 1  # Should be 1 now
     
+    def test_execute_with_stats_reports_single_call(self):
+        """Test that per-call statistics are not accumulated across calls."""
+        agent = SimpleAgent()
+        strategy = StrategyFactory.create_compiled()
+        
+        result, stats = strategy.execute_with_stats(agent, "Hello")
+        assert "Hello" in result
+        assert stats == {"cache_hits": 0, "cache_misses": 1, "hit_rate": 0.0}
+        
+        _, stats = strategy.execute_with_stats(agent, "Hello")
+        assert stats == {"cache_hits": 1, "cache_misses": 0, "hit_rate": 1.0}
+        assert strategy.execution_count == 2
+        
+        _, stats = StrategyFactory.create_traditional().execute_with_stats(agent, "Hello")
+        assert stats == {"cache_hits": 0, "cache_misses": 0, "hit_rate": 0.0}
+    
+    def test_invalid_cached_graph_falls_back_to_fresh_build(self):
+        """Test that an invalid cached graph is replaced by a newly built one."""
+        agent = SimpleAgent()
+        strategy = StrategyFactory.create_compiled()
+        invalid = Graph("invalid")
+        strategy.cache.set(agent, invalid)
+        assert strategy.cache.get(agent) == (invalid, False)
+        
+        result = strategy.execute(agent, "Hello")
+        
+        assert "Hello" in result
+        assert strategy.cache_hits == 1
+        assert strategy.cache.get(agent).valid is True
+    
+    def test_cache_key_is_agent_identity(self):
+        """Test that the cache key follows the agent instance, not its tool set."""
+        from agents.base import SimpleTool
+        agent = SimpleAgent()
+        strategy = StrategyFactory.create_compiled()
+        
+        key = strategy.cache._generate_key(agent)
+        assert key == strategy.cache._generate_key(agent)
+        assert key != strategy.cache._generate_key(SimpleAgent())
+        
+        # The cached graph picks up tools registered after it was built
+        strategy.execute(agent, "Hello")
+        agent.register_tool(SimpleTool("calculator", "Always 42", lambda expression: 42))
+        assert strategy.cache._generate_key(agent) == key
+        assert strategy.execute(agent, "calculate 2+2").endswith("Tool result: 42")
+        assert strategy.cache_misses == 1
+    
+    def test_cache_lru_eviction(self):
+        """Test that a full cache evicts only the least recently used graph."""
+        strategy = StrategyFactory.create_compiled(cache_size=2)
+        agents = [SimpleAgent(f"agent_{i}") for i in range(3)]
+        
+        strategy.execute(agents[0], "Hello")
+        strategy.execute(agents[1], "Hello")
+        strategy.execute(agents[0], "Hello")  # agent_0 becomes most recent
+        strategy.execute(agents[2], "Hello")  # evicts agent_1
+        
+        assert strategy.cache.get(agents[0]) is not None
+        assert strategy.cache.get(agents[1]) is None
+        assert strategy.cache.get(agents[2]) is not None
+    
     def test_compiled_strategy_stats(self):
         """Test compiled strategy statistics."""
         agent = SimpleAgent()
@@ -138,6 +253,26 @@ class TestStrategyFactory:
         strategy = StrategyFactory.create_best_automatic()
         # Currently defaults to compiled strategy
         assert isinstance(strategy, CompiledStrategy)
+    
+    def test_create_by_name(self, monkeypatch):
+        """Test creating strategies through the name registry."""
+        assert isinstance(StrategyFactory.create("traditional"), TraditionalStrategy)
+        assert isinstance(StrategyFactory.create("compiled"), CompiledStrategy)
+        
+        with pytest.raises(ValueError, match="Unknown strategy: custom"):
+            StrategyFactory.create("custom")
+        
+        # Keep the registration local to this test
+        monkeypatch.setattr(execution, "_STRATEGY_CREATORS", dict(execution._STRATEGY_CREATORS))
+        StrategyFactory.register("custom", lambda: CompiledStrategy(cache_size=1))
+        assert isinstance(StrategyFactory.create("custom"), CompiledStrategy)
+        assert isinstance(AgentCompiler.compile(SimpleAgent(), "custom")._strategy, CompiledStrategy)
+    
+    def test_slots(self):
+        """Test that strategies and compiled agents carry no per-instance __dict__."""
+        assert not hasattr(StrategyFactory.create_traditional(), "__dict__")
+        assert not hasattr(StrategyFactory.create_compiled(), "__dict__")
+        assert not hasattr(compile(SimpleAgent()), "__dict__")
 
 
 class TestCompiledAgent:
@@ -235,6 +370,21 @@ class TestAgentCompiler:
         stats = compiled_agent.get_stats()
         assert stats["strategy"] == "CompiledStrategy"
     
+    def test_agents_sharing_a_strategy_keep_their_own_tools(self):
+        """Test that agents with the same tool names run their own tools from one cache."""
+        from agents.base import SimpleTool
+        default_agent = SimpleAgent()
+        custom_agent = SimpleAgent()
+        custom_agent.register_tool(SimpleTool("calculator", "Always 42", lambda expression: 42))
+        
+        strategy = StrategyFactory.create_compiled()
+        default = CompiledAgent(default_agent, strategy)
+        custom = CompiledAgent(custom_agent, strategy)
+        
+        assert default.run("calculate 2+2").endswith("Tool result: 4.0")
+        assert custom.run("calculate 2+2").endswith("Tool result: 42")
+        assert default.run("calculate 2+2").endswith("Tool result: 4.0")
+    
     def test_compile_invalid_strategy(self):
         """Test compilation with invalid strategy."""
         agent = SimpleAgent()
@@ -293,6 +443,18 @@ class TestExecutionBenchmark:
                 assert "avg_time" in result
                 assert "stats" in result
     
+    def test_benchmark_concurrent_stats(self):
+        """Test that concurrent benchmark execution keeps accurate stats."""
+        agent = SimpleAgent()
+        test_inputs = [f"Hello {i}" for i in range(20)]
+        strategy = StrategyFactory.create_compiled()
+        
+        results = ExecutionBenchmark.benchmark(agent, test_inputs, [strategy], max_workers=4)
+        
+        stats = results["CompiledStrategy"]["stats"]
+        assert stats["execution_count"] == 20
+        assert stats["cache_hits"] + stats["cache_misses"] == 20
+    
     def test_benchmark_with_default_inputs(self):
         """Test benchmarking with default test inputs."""
         agent = SimpleAgent()
@@ -1,8 +1,15 @@
 """Tests for graph execution engine."""
 
 import pytest
-from core.graph import Graph, Node, Edge
-from core.state import StateSchema, GraphState
+from core.graph import Graph, Node, Edge, Command
+from core.nodes import create_conditional_node, create_tool_call_node, create_input_node, create_output_node
+from core.state import StateSchema, AgentState, GraphState
+from core.edges import (
+    numeric_condition, logical_and, logical_or, key_equals, always_true, always_false,
+    has_key, has_messages, has_tool_calls, is_complete, current_node_equals,
+    string_contains, string_starts_with, bulk_string_contains, bulk_string_starts_with,
+    EdgeBuilder
+)
 
 
 class TestNode:
@@ -179,6 +186,26 @@ class TestGraph:
         with pytest.raises(ValueError, match="Target node 'nonexistent' not found"):
             graph.add_edge("source", "nonexistent")
     
+    def test_add_edges_bulk(self):
+        """Test adding a batch of edges built by EdgeBuilder."""
+        graph = Graph("test_graph")
+        
+        def test_func(state):
+            return state
+        
+        for name in ("start", "a", "b", "other"):
+            graph.add_node(name, test_func)
+        
+        graph.add_edges_bulk(EdgeBuilder.switch("start", {"a": "a", "b": "b"}, default="other"))
+        assert len(graph.edges) == 3
+        assert graph.get_next_nodes("start", StateSchema(switch_value="b")) == ["b", "other"]
+        assert graph.validate() == []
+        
+        # A missing endpoint rejects the whole batch
+        with pytest.raises(ValueError, match="Edge nodes not found"):
+            graph.add_edges_bulk([("a", "b", None), ("b", "missing", None)])
+        assert len(graph.edges) == 3
+    
     def test_set_entry_point(self):
         """Test setting entry point."""
         graph = Graph("test_graph")
@@ -337,6 +364,183 @@ class TestGraph:
         with pytest.raises(ValueError, match="Cycle detected"):
             graph.execute(StateSchema())
     
+    def test_is_acyclic(self):
+        """Test structural cycle detection."""
+        graph = Graph("test_graph")
+        
+        def test_func(state):
+            return state
+        
+        graph.add_node("node1", test_func)
+        graph.add_node("node2", test_func)
+        graph.add_node("node3", test_func)
+        graph.add_edge("node1", "node2")
+        graph.add_edge("node1", "node3")
+        graph.add_edge("node2", "node3")
+        assert graph.is_acyclic() is True
+        
+        # Adding a back edge invalidates the cached result
+        graph.add_edge("node3", "node1", lambda state: False)
+        assert graph.is_acyclic() is False
+    
+    def test_nodes_and_edges_are_read_only(self):
+        """Test that nodes and edges can only change through the Graph methods."""
+        graph = Graph("test_graph")
+        
+        def test_func(state):
+            return state
+        
+        graph.add_node("node1", test_func)
+        graph.add_node("node2", test_func)
+        graph.add_edge("node1", "node2")
+        
+        with pytest.raises(TypeError):
+            graph.nodes["node3"] = graph.nodes["node1"]
+        with pytest.raises(TypeError):
+            del graph.nodes["node2"]
+        with pytest.raises(AttributeError):
+            graph.edges.append(Edge("node2", "node1"))
+        
+        # Views reflect later changes made through the API
+        nodes = graph.nodes
+        graph.add_node("node3", test_func)
+        graph.add_edge("node2", "node3")
+        assert "node3" in nodes
+        assert [edge.target for edge in graph.edges] == ["node2", "node3"]
+    
+    def test_compile_plan_missing_target(self):
+        """Test that an edge to a missing node fails with ValueError, not KeyError."""
+        graph = Graph("test_graph")
+        
+        def test_func(state):
+            return state
+        
+        graph.add_node("node1", test_func)
+        graph.add_node("node2", test_func)
+        graph.add_edge("node1", "node2", lambda state: True)
+        del graph._nodes["node2"]
+        
+        with pytest.raises(ValueError, match="Node 'node2' not found"):
+            graph.compile_plan()
+        with pytest.raises(ValueError, match="Node 'node2' not found"):
+            graph.execute(StateSchema())
+    
+    def test_is_acyclic_ignores_dangling_edges(self):
+        """Test that edges to or from unregistered nodes don't break cycle detection."""
+        graph = Graph("test_graph")
+        
+        def test_func(state):
+            return state
+        
+        graph.add_node("node1", test_func)
+        graph.add_node("node2", test_func)
+        graph.add_node("node3", test_func)
+        graph.add_edge("node1", "node2")
+        graph.add_edge("node2", "node3")
+        graph.add_edge("node3", "node1", lambda state: False)
+        # Bypass the public API, which can no longer create dangling edges
+        graph._edges.append(Edge("ghost", "node1"))
+        del graph._nodes["node3"]
+        
+        assert graph.is_acyclic() is True
+        assert "Edge target 'node3' not found" in graph.validate()
+    
+    def test_linear_plan(self):
+        """Test that only linear chains get a pre-bound execution plan."""
+        graph = Graph("test_graph")
+        
+        def increment(state):
+            return state.set("count", state.get("count", 0) + 1)
+        
+        graph.add_node("node1", increment)
+        graph.add_node("node2", increment)
+        graph.add_node("node3", increment)
+        graph.add_edge("node1", "node2")
+        graph.add_edge("node2", "node3")
+        
+        plan = graph._get_linear_plan()
+        assert [name for name, _ in plan] == ["node1", "node2", "node3"]
+        assert graph.execute(StateSchema()).get("count") == 3
+        
+        # A conditional edge makes the graph non-linear
+        graph.add_edge("node3", "node1", lambda state: False)
+        assert graph._get_linear_plan() is None
+        assert graph.execute(StateSchema()).get("count") == 3
+    
+    def test_command_nodes(self):
+        """Test that nodes returning a Command have it applied atomically."""
+        graph = Graph("test_graph")
+        graph.add_node("route", create_conditional_node(key_equals("flag", True), "yes", "no"))
+        graph.add_node("tool", create_tool_call_node("double", lambda x: x * 2,
+                                                     lambda state: {"x": state.get("x")}))
+        graph.add_edge("route", "tool")
+        
+        final_state = graph.execute(GraphState().update(flag=True, x=21))
+        assert isinstance(final_state, GraphState)
+        assert final_state.next_node == "yes"
+        assert final_state.get("double_result") == 42
+        
+        assert Command().apply(final_state) is final_state
+    
+    def test_node_factories_called_directly(self):
+        """Test the state or Command returned by node functions used outside a Graph."""
+        tool_node = create_tool_call_node("double", lambda x: x * 2, lambda state: {"x": state.get("x")})
+        state = tool_node(GraphState().set("x", 21))
+        assert isinstance(state, GraphState)
+        assert state.get("double_result") == 42
+        
+        route = create_conditional_node(key_equals("flag", True), "yes", "no")
+        command = route(state)
+        assert command == Command(goto="no")
+        assert command.apply(state).next_node == "no"
+    
+    def test_node_state_type_dispatch(self):
+        """Test that built-in nodes handle each state type, including subclasses."""
+        class CustomAgentState(AgentState):
+            pass
+        
+        input_node = create_input_node()
+        output_node = create_output_node()
+        
+        agent_state = input_node(CustomAgentState().set("input", "Hello"))
+        assert agent_state.last_user_message() == "Hello"
+        assert output_node(agent_state).get("output") == "No response generated"
+        
+        graph_state = input_node(GraphState().set("input", "Hello"))
+        assert graph_state.context["user_input"] == "Hello"
+        assert output_node(graph_state.add_context("response", "Hi")).get("output") == "Hi"
+        
+        plain_state = input_node(StateSchema(input="Hello", response="Hi"))
+        assert plain_state.get("user_input") == "Hello"
+        assert output_node(plain_state).get("output") == "Hi"
+    
+    def test_compile_plan(self):
+        """Test the integer-indexed execution plan."""
+        graph = Graph("test_graph")
+        
+        def test_func(state):
+            return state
+        
+        graph.add_node("node1", test_func)
+        graph.add_node("node2", test_func)
+        graph.add_node("node3", test_func)
+        graph.add_edge("node1", "node2")
+        graph.add_edge("node2", "node3", lambda state: True)
+        graph.set_entry_point("node2")
+        
+        plan = graph.compile_plan()
+        assert plan.entry_id == 1
+        assert plan.names == ("node1", "node2", "node3")
+        assert plan.sole_next == (1, -1, -1)
+        assert [target for target, _ in plan.next_by_id[1]] == [2]
+        assert plan.next_by_id[2] == ()
+        assert graph.compile_plan() is plan
+        
+        # Changing the graph rebuilds the plan
+        graph.add_edge("node3", "node1")
+        assert graph.compile_plan() is not plan
+        assert graph.compile_plan().sole_next == (1, -1, 0)
+    
     def test_graph_validation(self):
         """Test graph validation."""
         graph = Graph("test_graph")
@@ -363,6 +567,24 @@ class TestGraph:
         issues = graph.validate()
         assert len(issues) == 0
     
+    def test_graph_validation_issue_order(self):
+        """Test that orphaned nodes are reported before dangling edges."""
+        graph = Graph("test_graph")
+        
+        def test_func(state):
+            return state
+        
+        graph.add_node("node1", test_func)
+        graph.add_node("node2", test_func)
+        graph.set_entry_point("node1")
+        # Bypass add_edge's endpoint check to create a dangling edge
+        graph._edges.append(Edge("ghost", "node1"))
+        
+        assert graph.validate() == [
+            "Node 'node2' has no incoming edges and is not entry point",
+            "Edge source 'ghost' not found"
+        ]
+    
     def test_graph_visualization(self):
         """Test graph visualization."""
         graph = Graph("test_graph")
@@ -397,4 +619,78 @@ class TestGraph:
         repr_str = repr(graph)
         assert "test_graph" in repr_str
         assert "nodes=2" in repr_str
-        assert "edges=1" in repr_str
\ No newline at end of file
+        assert "edges=1" in repr_str
+
+
+class TestEdgeConditions:
+    """Test edge condition factories."""
+    
+    def test_numeric_condition(self):
+        """Test numeric comparisons for every supported operator."""
+        state = StateSchema(score=5)
+        
+        assert numeric_condition("score", ">", 3)(state) is True
+        assert numeric_condition("score", ">=", 5)(state) is True
+        assert numeric_condition("score", "<", 5)(state) is False
+        assert numeric_condition("score", "<=", 4)(state) is False
+        assert numeric_condition("score", "==", 5)(state) is True
+        assert numeric_condition("score", "!=", 5)(state) is False
+        
+        # Non-numeric or missing values never match
+        assert numeric_condition("score", ">", 3)(StateSchema(score="high")) is False
+        assert numeric_condition("missing", ">", 3)(state) is False
+    
+    def test_numeric_condition_unknown_operator(self):
+        """Test that unknown operators are rejected up front."""
+        with pytest.raises(ValueError, match="Unknown operator"):
+            numeric_condition("score", "<>", 3)
+    
+    def test_state_conditions(self):
+        """Test duck-typed state conditions across state types."""
+        agent_state = AgentState().add_message("user", "Hello").add_tool_call("calculator", {})
+        plain_state = StateSchema(is_complete=True, current_node="node1", empty=None)
+        
+        assert has_messages()(agent_state) is True
+        assert has_messages(2)(agent_state) is False
+        assert has_messages()(plain_state) is False
+        assert has_tool_calls()(agent_state) is True
+        assert has_tool_calls()(plain_state) is False
+        assert is_complete(None)(agent_state) is False
+        assert is_complete(None)(plain_state) is True
+        assert current_node_equals("node1")(GraphState(current_node="node1")) is True
+        assert current_node_equals("node1")(plain_state) is True
+        assert current_node_equals("node1")(agent_state) is False
+        
+        # A key holding None still counts as present
+        assert has_key("empty")(plain_state) is True
+        assert has_key("missing")(plain_state) is False
+    
+    def test_bulk_string_conditions(self):
+        """Test batch string checks against the single-state conditions."""
+        values = ["hello world", "world", None, 42, ""]
+        
+        contains = string_contains("value", "world")
+        starts_with = string_starts_with("value", "hello")
+        assert bulk_string_contains(values, "world") == [contains(StateSchema(value=v)) for v in values]
+        assert bulk_string_starts_with(values, "hello") == [starts_with(StateSchema(value=v)) for v in values]
+    
+    def test_logical_combinators(self):
+        """Test AND/OR combinators across arities, including nesting."""
+        state = StateSchema(a=1, b=2)
+        is_a = key_equals("a", 1)
+        is_b = key_equals("b", 2)
+        
+        assert logical_and()(state) is True
+        assert logical_or()(state) is False
+        assert logical_and(is_a, is_b)(state) is True
+        assert logical_and(is_a, is_b, always_false)(state) is False
+        assert logical_or(always_false, always_false, is_b)(state) is True
+        
+        # Nested combinators are flattened into a single operand tuple
+        nested = logical_and(logical_and(is_a, is_b), logical_and(always_true, is_a))
+        assert nested._conjunction == (is_a, is_b, always_true, is_a)
+        assert nested(state) is True
+        
+        nested_or = logical_or(logical_or(always_false, always_false), logical_or(always_false, is_a))
+        assert len(nested_or._disjunction) == 4
+        assert nested_or(state) is True
@@ -23,6 +23,32 @@ class TestStateSchema:
         assert state2.get("test_key") == "modified"
         assert state1 is not state2
     
+    def test_structural_sharing(self):
+        """Test that updates share unchanged values and clone does not."""
+        state1 = StateSchema(items=[1, 2], name="John")
+        state2 = state1.set("name", "Jane")
+        state3 = state1.update(name="Jack", age=30)
+        
+        assert state2.get("items") is state1.get("items")
+        assert state3.get("items") is state1.get("items")
+        assert type(state2) is StateSchema
+        
+        clone = state1.clone()
+        assert clone == state1
+        assert clone.get("items") is not state1.get("items")
+    
+    def test_update_type_validation(self):
+        """Test that set and update validate the new values."""
+        class TestState(StateSchema):
+            name: str
+        
+        state = TestState(name="John")
+        with pytest.raises(StateValidationError):
+            state.set("name", 123)
+        with pytest.raises(StateValidationError):
+            state.update(name=123)
+        assert state.update(name="Jane").get("name") == "Jane"
+    
     def test_type_validation(self):
         """Test type validation."""
         class TestState(StateSchema):
@@ -41,6 +67,24 @@ class TestStateSchema:
         with pytest.raises(StateValidationError):
             TestState(name="John", age="thirty")  # age should be int
     
+    def test_field_checks_cached_per_class(self):
+        """Test that type hints are resolved once per class."""
+        class TestState(StateSchema):
+            name: str
+            tags: list
+        
+        class ChildState(TestState):
+            age: int
+        
+        checks = TestState._field_checks()
+        assert TestState._field_checks() is checks
+        assert checks == {"name": (str, str), "tags": (list, list)}
+        
+        # Subclasses resolve their own hints, including inherited ones
+        assert set(ChildState._field_checks()) == {"name", "tags", "age"}
+        with pytest.raises(StateValidationError):
+            ChildState(name="John", age="thirty")
+    
     def test_to_dict(self):
         """Test dictionary conversion."""
         state = StateSchema(name="John", age=30)
@@ -49,6 +93,19 @@ class TestStateSchema:
         assert state_dict == {"name": "John", "age": 30}
         assert isinstance(state_dict, dict)
     
+    def test_to_dict_copies(self):
+        """Test shallow and deep dictionary conversion."""
+        state = StateSchema(items=[1, 2])
+        
+        shallow = state.to_dict()
+        shallow["extra"] = True
+        assert state.get("extra") is None
+        assert shallow["items"] is state.get("items")
+        
+        deep = state.deep_to_dict()
+        assert deep == {"items": [1, 2]}
+        assert deep["items"] is not state.get("items")
+    
     def test_to_json(self):
         """Test JSON conversion."""
         state = StateSchema(name="John", age=30)
@@ -65,6 +122,7 @@ class TestStateSchema:
         state3 = StateSchema(name="Jane", age=25)
         
         assert state1 == state2
+        assert state1 == state1
         assert state1 != state3
         assert state1 != "not a state"
     
@@ -134,6 +192,52 @@ class TestAgentState:
         assert new_state.intermediate_steps[0] == step
         assert state.intermediate_steps == []  # Original state unchanged
     
+    def test_append_shares_prior_items(self):
+        """Test that add_* helpers share earlier items with the source state."""
+        state1 = AgentState().add_message("user", "Hello").add_tool_call("calculator", {})
+        state2 = state1.add_message("assistant", "Hi").add_intermediate_step({"tool": "calculator"})
+        
+        assert state2.messages[0] is state1.messages[0]
+        assert state2.tool_calls is state1.tool_calls
+        assert len(state1.messages) == 1
+        assert state1.intermediate_steps == []
+        assert isinstance(state2, AgentState)
+        assert isinstance(state2.messages, list)
+    
+    def test_role_accessors(self):
+        """Test last-message and assistant-count accessors."""
+        state = AgentState(messages=[
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi there!"}
+        ])
+        
+        assert state.last_user_message() == "Hello"
+        assert state.last_assistant_message() == "Hi there!"
+        assert state.assistant_count == 1
+        
+        new_state = state.add_message("user", "Bye").add_message("assistant", "Goodbye!")
+        assert new_state.last_user_message() == "Bye"
+        assert new_state.last_assistant_message() == "Goodbye!"
+        assert new_state.assistant_count == 2
+        
+        # Updates that leave messages alone keep the index
+        completed_state = new_state.update(is_complete=True)
+        assert completed_state._last_index is new_state._last_index
+        assert completed_state.assistant_count == 2
+        
+        empty_state = AgentState()
+        assert empty_state.last_user_message() is None
+        assert empty_state.last_assistant_message() is None
+        assert empty_state.assistant_count == 0
+    
+    def test_slots(self):
+        """Test that built-in states carry no per-instance __dict__."""
+        state = AgentState().add_message("user", "Hello").update(is_complete=True)
+        assert not hasattr(state, "__dict__")
+        assert not hasattr(GraphState(), "__dict__")
+        assert state.clone() == state
+        assert state.clone().last_user_message() == "Hello"
+    
     def test_chained_operations(self):
         """Test chaining multiple operations."""
         state = AgentState()
@@ -240,4 +344,30 @@ class TestGraphState:
             "node1": "success",
             "node2": "error",
             "node3": "completed"
-        }
\ No newline at end of file
+        }
+    
+    def test_merge_shares_prior_entries(self):
+        """Test that add_context/add_result share values and leave the source unchanged."""
+        payload = {"nested": [1, 2]}
+        state1 = GraphState(current_node="node1").add_context("payload", payload)
+        state2 = state1.add_context("user", "John").add_result("node1", "done")
+        
+        assert state2.context["payload"] is state1.context["payload"]
+        assert state1.context == {"payload": payload}
+        assert state1.results == {}
+        assert state2.current_node == "node1"
+        assert isinstance(state2, GraphState)
+    
+    def test_extend_context_and_results(self):
+        """Test that bulk extends match chained add_* calls."""
+        state = GraphState().add_context("input", "Hello")
+        
+        extended = state.extend_context({"user": "John", "session": "123"})
+        chained = state.add_context("user", "John").add_context("session", "123")
+        assert extended == chained
+        assert extended.context == {"input": "Hello", "user": "John", "session": "123"}
+        assert state.context == {"input": "Hello"}
+        
+        results = extended.extend_results({"node1": "success", "node2": "error"})
+        assert results.results == {"node1": "success", "node2": "error"}
+        assert results.context is extended.context
@@ -91,6 +91,35 @@ class TestStrategySelector:
         strategy = selector.create_strategy()
         assert isinstance(strategy, TraditionalStrategy)
     
+    def test_strategy_instances_reused(self):
+        """Test that each strategy type is instantiated once per selector."""
+        selector = StrategySelector()
+        agent = SimpleAgent()
+        
+        compiled = selector.create_strategy(request_strategy="compiled")
+        assert selector.create_strategy(request_strategy="compiled") is compiled
+        assert selector.create_strategy(request_strategy="traditional") is not compiled
+        
+        # The graph cache now carries over between requests
+        compiled.execute(agent, "Hello")
+        selector.create_strategy(request_strategy="compiled").execute(agent, "Hello")
+        assert compiled.cache_hits == 1
+    
+    def test_reused_strategy_runs_each_pooled_agent_graph(self):
+        """Test that pooled agents sharing a strategy execute their own graphs."""
+        from agents.base import SimpleTool
+        from api.endpoints import _create_agent
+        selector = StrategySelector()
+        pooled = [_create_agent() for _ in range(2)]
+        pooled[1].register_tool(SimpleTool("calculator", "Always 42", lambda expression: 42))
+        
+        compiled = selector.create_strategy(request_strategy="compiled")
+        assert compiled.execute(pooled[0], "calculate 2+2").endswith("Tool result: 4.0")
+        assert compiled.execute(pooled[1], "calculate 2+2").endswith("Tool result: 42")
+        
+        graphs = [entry.graph for entry in compiled.cache._cache.values()]
+        assert graphs == [agent.create_graph() for agent in pooled]
+    
     def test_invalid_strategy_handling(self):
         """Test handling of invalid strategy names."""
         selector = StrategySelector()